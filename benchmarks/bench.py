@@ -0,0 +1,294 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Microbenchmarks for colorama's hot paths.
+#
+#     python benchmarks/bench.py run -o before.json
+#     python benchmarks/bench.py run -o after.json
+#     python benchmarks/bench.py compare before.json after.json
+#
+# 'compare' exits with status 1 if any benchmark got slower by more than the
+# threshold.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+import fixpath
+import colorama
+from colorama import ansi, initialise
+from colorama.ansitowin32 import AnsiToWin32
+from colorama.tee import ConvertSink, StripSink, Tee
+from colorama.tests.fakeconsole import FakeConsole, emulate
+from synthetic import chunks, generate
+
+
+class NullStream:
+    closed = False
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def sample(options, **overrides):
+    settings = dict(
+        size=options.size,
+        seed=options.seed,
+        escape_density=options.escape_density,
+        max_params=options.max_params,
+        line_length=options.line_length,
+    )
+    settings.update(overrides)
+    return chunks(generate(**settings), options.chunk)
+
+
+def write_all(converter, data):
+    write = converter.write
+    def run():
+        for chunk in data:
+            write(chunk)
+    return run
+
+
+@benchmark
+def write_passthrough(options):
+    data = sample(options)
+    yield write_all(AnsiToWin32(NullStream(), convert=False, strip=False), data), options.size
+
+
+@benchmark
+def write_strip(options):
+    data = sample(options, osc_density=0.01)
+    yield write_all(AnsiToWin32(NullStream(), convert=False, strip=True), data), options.size
+
+
+@benchmark
+def write_convert(options):
+    data = sample(options, osc_density=0.01, cursor_density=0.02)
+    with emulate(FakeConsole()):
+        yield write_all(AnsiToWin32(NullStream(), convert=True, strip=True), data), options.size
+
+
+@benchmark
+def tee_two_converters(options):
+    data = sample(options, osc_density=0.01)
+    console = AnsiToWin32(NullStream(), convert=False, strip=True)
+    log = AnsiToWin32(NullStream(), convert=False, strip=True)
+    def run():
+        for chunk in data:
+            console.write(chunk)
+            log.write(chunk)
+    yield run, options.size
+
+
+@benchmark
+def tee_shared_tokens(options):
+    data = sample(options, osc_density=0.01)
+    tee = Tee(ConvertSink(NullStream(), convert=False, strip=True), StripSink(NullStream()))
+    yield write_all(tee, data), options.size
+
+
+@benchmark
+def extract_params(options):
+    converter = AnsiToWin32(NullStream())
+    extract = converter.extract_params
+    def run():
+        extract('m', '1;31;42')
+        extract('m', '')
+        extract('H', '12;40')
+        extract('A', '3')
+    yield run, 0
+
+
+@benchmark
+def convert_osc(options):
+    text = generate(size=4096, seed=options.seed, escape_density=0.1, osc_density=0.05)
+    converter = AnsiToWin32(NullStream())
+    with emulate(FakeConsole()):
+        yield (lambda: converter.convert_osc(text)), len(text)
+
+
+# Adversarial OSC inputs: these used to take time quadratic in the input size.
+
+@benchmark
+def osc_unterminated_starts(options):
+    text = '\033]0;' * (options.size // 4)
+    converter = AnsiToWin32(NullStream())
+    with emulate(FakeConsole()):
+        yield (lambda: converter.convert_osc(text)), len(text)
+
+
+@benchmark
+def osc_unterminated_payload(options):
+    text = '\033]2;' + 'x' * options.size
+    converter = AnsiToWin32(NullStream())
+    with emulate(FakeConsole()):
+        yield (lambda: converter.convert_osc(text)), len(text)
+
+
+@benchmark
+def osc_truncated_titles(options):
+    text = ('\033]2;' + 'x' * 60 + ' ') * (options.size // 66)
+    converter = AnsiToWin32(NullStream())
+    with emulate(FakeConsole()):
+        yield (lambda: converter.convert_osc(text)), len(text)
+
+
+# ESC[2J against a console with the default 9001-line scrollback.
+
+def clear_screen(clear_mode):
+    def bench(options):
+        converter = AnsiToWin32(NullStream(), convert=True, strip=True)
+        with emulate(FakeConsole(height=9001)) as term:
+            term.clear_mode = clear_mode
+            yield (lambda: converter.write('\033[2J')), 0
+    bench.__name__ = 'clear_screen_' + clear_mode
+    return benchmark(bench)
+
+
+for _mode in ('buffer', 'viewport', 'scroll'):
+    clear_screen(_mode)
+
+
+@benchmark
+def code_to_chars(options):
+    convert = ansi.code_to_chars
+    def run():
+        for code in (0, 1, 31, 42, 97, 107):
+            convert(code)
+    yield run, 0
+
+
+@benchmark
+def ansi_codes_construction(options):
+    def run():
+        ansi.AnsiFore()
+        ansi.AnsiBack()
+        ansi.AnsiStyle()
+    yield run, 0
+
+
+@benchmark
+def init_deinit(options):
+    saved = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = NullStream()
+    try:
+        def run():
+            initialise.init(strip=True)
+            initialise.deinit()
+        yield run, 0
+    finally:
+        sys.stdout, sys.stderr = saved
+        initialise._wipe_internal_state_for_tests()
+
+
+def measure(func, repeat):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_op = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return dict(
+        per_op=min(per_op),
+        median=statistics.median(per_op),
+        number=number,
+        repeat=repeat,
+    )
+
+
+def run(options):
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if options.filter and options.filter not in name:
+            continue
+        steps = bench(options)
+        func, size = next(steps)
+        result = measure(func, options.repeat)
+        steps.close()
+        if size:
+            result['bytes_per_sec'] = size / result['per_op']
+        results[name] = result
+        print('%-26s %12.3f us/op%s' % (
+            name, result['per_op'] * 1e6,
+            '  %8.2f MB/s' % (result['bytes_per_sec'] / 1e6) if size else ''))
+    report = dict(
+        meta=dict(
+            colorama=colorama.__version__,
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            options=vars(options),
+        ),
+        results=results,
+    )
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+def compare(options):
+    with open(options.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(options.current) as f:
+        current = json.load(f)['results']
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        ratio = current[name]['per_op'] / baseline[name]['per_op']
+        flag = ''
+        if ratio > 1 + options.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 - options.threshold:
+            flag = '  improved'
+        print('%-26s %12.3f -> %12.3f us/op  x%.2f%s' % (
+            name, baseline[name]['per_op'] * 1e6, current[name]['per_op'] * 1e6,
+            ratio, flag))
+    for name in sorted(set(baseline) ^ set(current)):
+        print('%-26s only in %s' % (
+            name, options.baseline if name in baseline else options.current))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', help='write results as JSON')
+    run_parser.add_argument('-k', '--filter', help='only run benchmarks containing this')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--size', type=int, default=64 * 1024)
+    run_parser.add_argument('--chunk', type=int, default=256)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--escape-density', type=float, default=0.2)
+    run_parser.add_argument('--max-params', type=int, default=3)
+    run_parser.add_argument('--line-length', type=int, default=80)
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative slowdown to report as a regression')
+
+    options = parser.parse_args(argv)
+    if options.command == 'run':
+        run(options)
+        return 0
+    return compare(options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
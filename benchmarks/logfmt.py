@@ -0,0 +1,97 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Formats log records with colorama.logging.ColorFormatter and with the usual
+# hand-rolled formatter that concatenates Fore/Style codes in format() for
+# every record.
+#
+#     python benchmarks/logfmt.py --records 1000000
+#
+# Prints the time per record and the records per second of each formatter,
+# for a terminal and for a destination that colorama would strip.
+import argparse
+import logging
+import time
+from io import StringIO
+
+import fixpath
+from colorama import Fore, Style
+from colorama.logging import ColorFormatter
+
+FORMAT = '%(asctime)s %(levelname)-8s %(name)s: %(message)s'
+
+LEVELS = (logging.DEBUG, logging.INFO, logging.INFO, logging.INFO,
+          logging.WARNING, logging.ERROR, logging.CRITICAL)
+
+
+class NaiveColorFormatter(logging.Formatter):
+
+    COLORS = {
+        'DEBUG': Style.DIM,
+        'INFO': Fore.GREEN,
+        'WARNING': Fore.YELLOW,
+        'ERROR': Fore.RED,
+        'CRITICAL': Fore.RED + Style.BRIGHT,
+    }
+
+    def format(self, record):
+        levelname = record.levelname
+        record.levelname = self.COLORS.get(levelname, '') + levelname + Style.RESET_ALL
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+
+
+class TtyStream(StringIO):
+
+    def isatty(self):
+        return True
+
+
+def make_records(count):
+    return [
+        logging.LogRecord('app.module', LEVELS[i % len(LEVELS)], __file__, i,
+                          'request %d handled in %.1f ms', (i, i / 7), None)
+        for i in range(count)
+    ]
+
+
+def run(formatter, records, total):
+    format = formatter.format
+    rounds, rest = divmod(total, len(records))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for record in records:
+            format(record)
+    for record in records[:rest]:
+        format(record)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1000000)
+    parser.add_argument('--pool', type=int, default=1000)
+    options = parser.parse_args(argv)
+
+    records = make_records(options.pool)
+    formatters = [
+        ('plain logging.Formatter', logging.Formatter(FORMAT)),
+        ('naive color, terminal', NaiveColorFormatter(FORMAT)),
+        ('ColorFormatter, terminal', ColorFormatter(FORMAT, stream=TtyStream())),
+        ('naive color, stripped', NaiveColorFormatter(FORMAT)),
+        ('ColorFormatter, stripped', ColorFormatter(FORMAT, stream=StringIO())),
+    ]
+    baseline = None
+    for name, formatter in formatters:
+        run(formatter, records, len(records))
+        elapsed = run(formatter, records, options.records)
+        if baseline is None:
+            baseline = elapsed
+        print('%-26s %8.3f us/record %10.0f records/s  x%.2f of plain' % (
+            name, elapsed / options.records * 1e6, options.records / elapsed,
+            elapsed / baseline))
+
+
+if __name__ == '__main__':
+    main()
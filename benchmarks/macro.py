@@ -0,0 +1,129 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Macro benchmark: replays each recording in benchmarks/corpus/ through
+# AnsiToWin32, write by write, in passthrough, strip and convert modes.
+# Convert mode runs against the emulated console, so it works on any OS.
+#
+#     python benchmarks/macro.py
+#     python benchmarks/macro.py -k pytest --mode convert -o macro.json
+#
+# For each workload and mode it reports throughput, the write() and flush()
+# calls that reached the underlying stream (each one a syscall on an
+# unbuffered console), and the number of console API calls.
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import timeit
+
+import fixpath
+import colorama
+from colorama.ansitowin32 import AnsiToWin32
+from colorama.asciicast import read_events
+from colorama.tests.fakeconsole import FakeConsole, emulate
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+MODES = {
+    'passthrough': dict(convert=False, strip=False),
+    'strip': dict(convert=False, strip=True),
+    'convert': dict(convert=True, strip=True),
+}
+
+
+class CountingStream:
+    closed = False
+
+    def __init__(self):
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes += 1
+
+    def flush(self):
+        self.flushes += 1
+
+    def isatty(self):
+        return False
+
+
+def load(path):
+    return [text for _, text in read_events(path)]
+
+
+def replay(writes, mode):
+    stream = CountingStream()
+    write = AnsiToWin32(stream, **MODES[mode]).write
+    def run():
+        for text in writes:
+            write(text)
+    return stream, run
+
+
+def measure(writes, mode, repeat):
+    console = FakeConsole()
+    with emulate(console):
+        stream, run = replay(writes, mode)
+        console.calls.clear()
+        run()
+        counts = dict(
+            stream_writes=stream.writes,
+            stream_flushes=stream.flushes,
+            console_calls=sum(console.calls.values()),
+        )
+        timer = timeit.Timer(run)
+        number, _ = timer.autorange()
+        per_run = min(timer.repeat(repeat, number)) / number
+    return dict(per_run=per_run, **counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--output', help='write results as JSON')
+    parser.add_argument('-k', '--filter', help='only replay recordings containing this')
+    parser.add_argument('--mode', choices=sorted(MODES), action='append',
+                        help='modes to run (default: all)')
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args(argv)
+
+    results = {}
+    print('%-10s %-12s %9s %10s %8s %8s %8s %9s' % (
+        'workload', 'mode', 'bytes', 'MB/s', 'writes', 'out', 'flushes', 'console'))
+    for path in sorted(glob.glob(os.path.join(options.corpus, '*.cast'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if options.filter and options.filter not in name:
+            continue
+        writes = load(path)
+        size = sum(map(len, writes))
+        for mode in options.mode or MODES:
+            result = measure(writes, mode, options.repeat)
+            result.update(writes=len(writes), bytes=size,
+                          bytes_per_sec=size / result['per_run'])
+            results['%s/%s' % (name, mode)] = result
+            print('%-10s %-12s %9d %10.2f %8d %8d %8d %9d' % (
+                name, mode, size, result['bytes_per_sec'] / 1e6, len(writes),
+                result['stream_writes'], result['stream_flushes'],
+                result['console_calls']))
+
+    if options.output:
+        report = dict(
+            meta=dict(
+                colorama=colorama.__version__,
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                options=vars(options),
+            ),
+            results=results,
+        )
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
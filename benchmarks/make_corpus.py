@@ -0,0 +1,237 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Regenerates the recordings in benchmarks/corpus/, which macro.py replays.
+#
+#     python benchmarks/make_corpus.py
+#
+# Each recording mimics the output of a real program, down to how it splits
+# its output into write() calls: pytest progress, pip download bars, tqdm
+# carriage-return updates, compiler diagnostics and `git log --color`. All the
+# text is generated from a fixed seed, so the corpus is reproducible and free
+# of third-party content. The demos/ scripts are run for real, in a
+# subprocess that captures each write.
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, 'corpus')
+DEMOS = os.path.join(HERE, '..', 'demos')
+
+WIDTH = 80
+HEIGHT = 24
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'do', 'fe']
+
+RECORDINGS = {}
+
+
+def recording(func):
+    RECORDINGS[func.__name__] = func
+    return func
+
+
+def word(rng, syllables=3):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, syllables)))
+
+
+def sentence(rng, words=8):
+    return ' '.join(word(rng) for _ in range(rng.randint(2, words)))
+
+
+@recording
+def pytest(rng):
+    yield '\033[1m' + ' test session starts '.center(WIDTH, '=') + '\033[0m\n'
+    yield 'platform linux -- Python 3.12.0, pytest-8.0.0, pluggy-1.4.0\n'
+    yield 'rootdir: /home/user/project\n'
+    files = ['tests/test_%s.py' % word(rng) for _ in range(40)]
+    counts = [rng.randint(5, 90) for _ in files]
+    total = sum(counts)
+    yield '\033[1mcollected %d items\033[0m\n\n' % total
+    done = 0
+    failures = 0
+    for name, count in zip(files, counts):
+        yield name + ' '
+        column = len(name) + 1
+        for _ in range(count):
+            if rng.random() < 0.01:
+                failures += 1
+                yield '\033[31mF\033[0m'
+            elif rng.random() < 0.02:
+                yield '\033[33ms\033[0m'
+            else:
+                yield '\033[32m.\033[0m'
+            done += 1
+            column += 1
+            if column == WIDTH - 7:
+                yield '\033[32m [%3d%%]\033[0m\n' % (100 * done // total)
+                column = 0
+        yield ' ' * (WIDTH - 7 - column)
+        yield '\033[32m [%3d%%]\033[0m\n' % (100 * done // total)
+    yield '\n\033[31m' + ' FAILURES '.center(WIDTH, '=') + '\033[0m\n'
+    for _ in range(failures):
+        yield '\033[31m\033[1m' + (' test_%s ' % word(rng)).center(WIDTH, '_') + '\033[0m\n\n'
+        for _ in range(rng.randint(3, 8)):
+            yield '    %s\n' % sentence(rng)
+        yield '\033[1m\033[31mE       AssertionError: %s\033[0m\n' % sentence(rng, 4)
+    summary = ' %d failed, %d passed in %.2fs ' % (failures, total - failures, total * 0.01)
+    yield '\033[31m' + summary.center(WIDTH, '=') + '\033[0m\n'
+
+
+def pip_bar(done, size, rate):
+    filled = int(40 * done / size)
+    bar = '\033[38;5;197m' + '\u2501' * filled + '\033[0m'
+    if filled < 40:
+        bar += '\033[38;5;237m\u257a' + '\u2501' * (39 - filled) + '\033[0m'
+    return '   %s \033[32m%.1f/%.1f MB\033[0m \033[31m%.1f MB/s\033[0m eta \033[36m0:00:%02d\033[0m' % (
+        bar, done, size, rate, int((size - done) / rate))
+
+
+@recording
+def pip(rng):
+    yield 'Collecting %s\n' % word(rng)
+    for _ in range(6):
+        package = word(rng)
+        version = '%d.%d.%d' % (rng.randint(0, 9), rng.randint(0, 30), rng.randint(0, 9))
+        size = rng.uniform(0.5, 40.0)
+        rate = rng.uniform(2.0, 20.0)
+        yield '  Downloading %s-%s-py3-none-any.whl (%.1f MB)\n' % (package, version, size)
+        yield '\033[?25l'
+        done = 0.0
+        while done < size:
+            done = min(size, done + rate / 10)
+            yield '\r\033[2K' + pip_bar(done, size, rate)
+        yield '\r\033[2K' + pip_bar(size, size, rate) + '\n\033[?25h'
+    yield 'Installing collected packages: %s\n' % ', '.join(word(rng) for _ in range(6))
+    yield 'Successfully installed %s\n' % ' '.join(word(rng) + '-1.0' for _ in range(6))
+
+
+@recording
+def tqdm(rng):
+    for _ in range(4):
+        total = rng.randint(500, 3000)
+        step = max(1, total // 500)
+        for n in range(0, total + 1, step):
+            filled = 10 * n / total
+            bar = '\u2588' * int(filled)
+            if n < total:
+                bar += ' \u258f\u258e\u258d\u258c\u258b\u258a\u2589'[int(filled % 1 * 8)]
+            yield '\r%3d%%|%-10s| %d/%d [00:%02d<00:%02d, %.2fit/s]' % (
+                100 * n // total, bar, n, total, n // 100 % 60,
+                (total - n) // 100 % 60, rng.uniform(90, 110))
+        yield '\n'
+
+
+@recording
+def compiler(rng):
+    for _ in range(150):
+        path = 'src/%s.c' % word(rng)
+        line = rng.randint(1, 2000)
+        column = rng.randint(1, 60)
+        kind = rng.choice(['error', 'warning', 'warning', 'note'])
+        color = {'error': '01;31', 'warning': '01;35', 'note': '01;36'}[kind]
+        yield '\033[01m\033[K%s:\033[m\033[K In function \u2018\033[01m\033[K%s\033[m\033[K\u2019:\n' % (
+            path, word(rng))
+        yield '\033[01m\033[K%s:%d:%d:\033[m\033[K \033[%sm\033[K%s:\033[m\033[K %s [\033[%sm\033[K-W%s\033[m\033[K]\n' % (
+            path, line, column, color, kind, sentence(rng), color, word(rng))
+        code = sentence(rng, 10)
+        yield '  %4d | %s\n' % (line, code)
+        caret = min(column, len(code))
+        yield '       | %s\033[%sm\033[K^%s\033[m\033[K\n' % (
+            ' ' * (caret - 1), color, '~' * rng.randint(0, 8))
+
+
+@recording
+def git_log(rng):
+    parts = []
+    for n in range(300):
+        sha = '%040x' % rng.getrandbits(160)
+        refs = ''
+        if n == 0:
+            refs = '\033[33m (\033[m\033[1;36mHEAD -> \033[m\033[1;32mmain\033[m\033[33m, \033[m\033[1;31morigin/main\033[m\033[33m)\033[m'
+        elif rng.random() < 0.05:
+            refs = '\033[33m (\033[m\033[1;33mtag: v%d.%d\033[m\033[33m)\033[m' % (rng.randint(0, 5), n)
+        name = word(rng).capitalize()
+        parts.append('\033[33mcommit %s\033[m%s\n' % (sha, refs))
+        parts.append('Author: %s <%s@example.com>\n' % (name, name.lower()))
+        parts.append('Date:   Mon Jan %d 12:%02d:00 2024 +0000\n\n' % (n % 28 + 1, n % 60))
+        for _ in range(rng.randint(1, 4)):
+            parts.append('    %s\n' % sentence(rng, 10))
+        parts.append('\n')
+    text = ''.join(parts)
+    # git writes through a 4 KiB stdio buffer when not attached to a pager
+    for start in range(0, len(text), 4096):
+        yield text[start:start + 4096]
+
+
+CAPTURE = '''
+import json, random, runpy, sys
+random.seed(0)
+
+class Capture:
+    def __init__(self, out):
+        self.out = out
+    def write(self, text):
+        self.out.write(json.dumps(text) + '\\n')
+        return len(text)
+    def flush(self):
+        self.out.flush()
+    def isatty(self):
+        return True
+    @property
+    def closed(self):
+        return self.out.closed
+
+sys.stdout = sys.stderr = Capture(sys.__stdout__)
+sys.argv = [sys.argv[1]]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+def demo(name):
+    def run(rng):
+        output = subprocess.run(
+            [sys.executable, '-c', CAPTURE, name + '.py'],
+            cwd=DEMOS, stdout=subprocess.PIPE, check=True,
+            env=dict(os.environ, TERM='xterm-256color'), universal_newlines=True,
+        ).stdout
+        for line in output.splitlines():
+            yield json.loads(line)
+    run.__name__ = name
+    return run
+
+
+for name in ('demo01', 'demo02', 'demo03', 'demo06', 'demo07', 'demo08'):
+    recording(demo(name))
+
+
+def write_cast(path, writes, rng):
+    header = dict(version=2, width=WIDTH, height=HEIGHT,
+                  env=dict(TERM='xterm-256color'))
+    elapsed = 0.0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps(header) + '\n')
+        for text in writes:
+            f.write('[%.6f, "o", %s]\n' % (elapsed, json.dumps(text, ensure_ascii=False)))
+            elapsed += rng.expovariate(1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*', help='recordings to regenerate (default: all)')
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(argv)
+    os.makedirs(options.corpus, exist_ok=True)
+    for name in options.names or RECORDINGS:
+        path = os.path.join(options.corpus, name + '.cast')
+        write_cast(path, RECORDINGS[name](random.Random(options.seed)),
+                   random.Random(options.seed))
+        print('%-10s %8d bytes' % (name, os.path.getsize(path)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Strips synthetic colored output into a pipe and into a file, once through
+# the text I/O stack (a write and flush per plain segment) and once with
+# AnsiToWin32(raw_fd=True) (one os.writev per write).
+#
+#     python benchmarks/rawfd.py --size 4194304 --chunk 256
+#
+# Prints the time per write and the throughput of each backend. Requires
+# os.writev (POSIX).
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import fixpath
+from colorama.ansitowin32 import AnsiToWin32
+from synthetic import chunks, generate
+
+
+def drain(fd):
+    while os.read(fd, 1 << 16):
+        pass
+
+
+def run(stream, data, raw_fd):
+    write = AnsiToWin32(stream, convert=False, strip=True, raw_fd=raw_fd).write
+    start = time.perf_counter()
+    for chunk in data:
+        write(chunk)
+    return time.perf_counter() - start
+
+
+def to_pipe(data, raw_fd):
+    read_fd, write_fd = os.pipe()
+    reader = threading.Thread(target=drain, args=(read_fd,))
+    reader.start()
+    try:
+        with open(write_fd, 'w', encoding='utf-8') as stream:
+            return run(stream, data, raw_fd)
+    finally:
+        reader.join()
+        os.close(read_fd)
+
+
+def to_file(data, raw_fd):
+    with tempfile.TemporaryFile('w', encoding='utf-8') as stream:
+        return run(stream, data, raw_fd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=4 * 1024 * 1024)
+    parser.add_argument('--chunk', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--escape-density', type=float, default=0.2)
+    options = parser.parse_args(argv)
+
+    if not hasattr(os, 'writev'):
+        parser.error('os.writev is not available on this platform')
+    data = chunks(generate(size=options.size, seed=options.seed,
+                           escape_density=options.escape_density, osc_density=0.01),
+                  options.chunk)
+    for target, func in (('pipe', to_pipe), ('file', to_file)):
+        baseline = None
+        for name, raw_fd in (('text I/O', False), ('writev', True)):
+            func(data[:100], raw_fd)
+            elapsed = func(data, raw_fd)
+            if baseline is None:
+                baseline = elapsed
+            print('%-4s %-9s %8.3f us/write %8.2f MB/s  x%.2f of text I/O' % (
+                target, name, elapsed / len(data) * 1e6,
+                options.size / elapsed / 1e6, elapsed / baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Memory report for long-lived wrapped streams: pushes mixed ANSI through
+# AnsiToWin32 in each mode, through init()/deinit()/reinit() cycles and
+# through colorama_text() contexts, under tracemalloc.
+#
+#     python benchmarks/soak.py --megabytes 300
+#
+# For each workload it prints the memory still allocated afterwards, the peak
+# over the run and the peak per MB written. colorama/tests/soak_test.py
+# asserts the same bounds on a smaller scale.
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+import fixpath
+from colorama import initialise
+from colorama.ansitowin32 import AnsiToWin32
+from colorama.tests.fakeconsole import FakeConsole, emulate
+from colorama.tests.soak_test import CHUNKS, CHUNK_BYTES, NullStream
+
+WORKLOADS = {}
+
+
+def workload(func):
+    WORKLOADS[func.__name__] = func
+    return func
+
+
+def converter(**kwargs):
+    write = AnsiToWin32(NullStream(), **kwargs).write
+    def iteration():
+        for chunk in CHUNKS:
+            write(chunk)
+    return iteration, CHUNK_BYTES
+
+
+@workload
+def passthrough():
+    yield converter(convert=False, strip=False)
+
+
+@workload
+def strip():
+    yield converter(convert=False, strip=True)
+
+
+@workload
+def convert():
+    with emulate(FakeConsole()):
+        yield converter(convert=True, strip=True)
+
+
+@workload
+def init_cycles():
+    saved = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = NullStream()
+    def iteration():
+        initialise.init(strip=True)
+        sys.stdout.write(CHUNKS[0])
+        initialise.deinit()
+        initialise.reinit()
+        sys.stderr.write(CHUNKS[1])
+        initialise.deinit()
+    try:
+        yield iteration, len(CHUNKS[0]) + len(CHUNKS[1])
+    finally:
+        sys.stdout, sys.stderr = saved
+        initialise._wipe_internal_state_for_tests()
+
+
+@workload
+def colorama_text():
+    saved = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = NullStream()
+    def iteration():
+        with initialise.colorama_text(strip=True, autoreset=True):
+            for chunk in CHUNKS:
+                sys.stdout.write(chunk)
+    try:
+        yield iteration, CHUNK_BYTES
+    finally:
+        sys.stdout, sys.stderr = saved
+        initialise._wipe_internal_state_for_tests()
+
+
+def soak(iteration, size, total):
+    for _ in range(50):
+        iteration()
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    try:
+        gc.collect()
+        baseline, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        written = 0
+        while written < total:
+            iteration()
+            written += size
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    return dict(
+        written=written,
+        seconds=elapsed,
+        retained=current - baseline,
+        peak=peak - baseline,
+        objects=len(gc.get_objects()) - objects,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', '--filter', help='only run workloads containing this')
+    parser.add_argument('--megabytes', type=float, default=16,
+                        help='MB to write through each workload')
+    options = parser.parse_args(argv)
+
+    print('%-14s %10s %9s %12s %12s %12s %8s' % (
+        'workload', 'MB', 'seconds', 'retained B', 'peak B', 'peak B/MB', 'objects'))
+    for name, func in WORKLOADS.items():
+        if options.filter and options.filter not in name:
+            continue
+        steps = func()
+        iteration, size = next(steps)
+        result = soak(iteration, size, int(options.megabytes * 1e6))
+        steps.close()
+        megabytes = result['written'] / 1e6
+        print('%-14s %10.1f %9.2f %12d %12d %12.1f %8d' % (
+            name, megabytes, result['seconds'], result['retained'],
+            result['peak'], result['peak'] / megabytes, result['objects']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+
+# Seeded generator of synthetic ANSI output, so that benchmark inputs are
+# reproducible across runs and machines.
+import random
+import string
+
+CSI = '\033['
+OSC = '\033]'
+BEL = '\a'
+
+SGR_CODES = [0, 1, 2, 22] + list(range(30, 38)) + [39] + list(range(40, 48)) + [49] \
+    + list(range(90, 98)) + list(range(100, 108))
+CURSOR_COMMANDS = 'ABCDHJK'
+WORDS = string.ascii_letters + string.digits
+
+
+def generate(size=64 * 1024, seed=0, escape_density=0.2, max_params=3,
+             line_length=80, osc_density=0.0, cursor_density=0.0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    column = 0
+    while total < size:
+        roll = rng.random()
+        if roll < escape_density:
+            part = sgr(rng, max_params)
+        elif roll < escape_density + cursor_density:
+            part = cursor(rng)
+        elif roll < escape_density + cursor_density + osc_density:
+            part = OSC + '2;' + word(rng, 4, 24) + BEL
+        else:
+            part = word(rng, 1, 12)
+            column += len(part) + 1
+            if column >= line_length:
+                part += '\n'
+                column = 0
+            else:
+                part += ' '
+        parts.append(part)
+        total += len(part)
+    return ''.join(parts)[:size]
+
+
+def word(rng, shortest, longest):
+    return ''.join(rng.choice(WORDS) for _ in range(rng.randint(shortest, longest)))
+
+
+def sgr(rng, max_params):
+    count = rng.randint(1, max_params)
+    return CSI + ';'.join(str(rng.choice(SGR_CODES)) for _ in range(count)) + 'm'
+
+
+def cursor(rng):
+    command = rng.choice(CURSOR_COMMANDS)
+    if command == 'H':
+        return CSI + '%d;%dH' % (rng.randint(1, 24), rng.randint(1, 80))
+    if command == 'J':
+        return CSI + '0J'
+    if command == 'K':
+        return CSI + '%dK' % rng.randint(0, 2)
+    return CSI + str(rng.randint(1, 5)) + command
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
@@ -1,6 +1,10 @@
 from .initialise import init, deinit, reinit, colorama_text, just_fix_windows_console
-from .ansi import Fore, Back, Style, Cursor
+from .ansi import Fore, Back, Style, Cursor, set_no_color
 from .ansitowin32 import AnsiToWin32
+from .live import LiveRegion
+from .terminal import terminal_size
+from .instrument import stats, Stats
+from .tracebuffer import trace, TraceBuffer
 
 __version__ = '0.4.7dev1'
 
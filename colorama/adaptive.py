@@ -0,0 +1,163 @@
+import re
+import threading
+import time
+
+
+FULL = 0
+STRIP = 1
+DROP_ANIMATION = 2
+COALESCE = 3
+
+LEVEL_NAMES = ('full', 'strip', 'drop_animation', 'coalesce')
+
+ANIMATION_RE = re.compile('[\r\b](?!\n)|\033\\[[\\d;]*[ADHf]')
+
+def log_transition(converter, old, new, latency):
+    import logging
+    logger = logging.getLogger('colorama')
+    log = logger.warning if new > old else logger.info
+    log('output to %r %s from %s to %s (latency %.1f ms)',
+        converter.wrapped, 'degraded' if new > old else 'recovered',
+        LEVEL_NAMES[old], LEVEL_NAMES[new], latency * 1e3)
+
+
+class AdaptivePolicy:
+
+    def __init__(self, thresholds=(0.005, 0.02, 0.05), recover=0.5, smoothing=0.2,
+                 hold=1.0, coalesce_interval=0.1, coalesce_size=64 * 1024,
+                 on_transition=log_transition):
+        if len(thresholds) != len(LEVEL_NAMES) - 1:
+            raise ValueError('one threshold is needed for each of %s'
+                             % ', '.join(LEVEL_NAMES[1:]))
+        self.thresholds = tuple(thresholds)
+        self.recover = recover
+        self.smoothing = smoothing
+        self.hold = hold
+        self.coalesce_interval = coalesce_interval
+        self.coalesce_size = coalesce_size
+        self.on_transition = on_transition
+
+
+class Adapter:
+
+    def __init__(self, converter, policy):
+        self.converter = converter
+        self.policy = policy
+        self.level = FULL
+        self.latency = 0.0
+        self.changed = self._clock()
+        self.pending = None
+        self.dropped = 0
+        self._buffer = []
+        self._buffered = 0
+        self._last_emit = self.changed
+        self._timer = None
+        self._lock = threading.RLock()
+        self._convert = converter.convert
+        self._strip = converter.strip
+
+    def _clock(self):
+        return time.monotonic()
+
+    def observe(self, seconds):
+        policy = self.policy
+        self.latency += policy.smoothing * (seconds - self.latency)
+        level = self.level
+        target = sum(1 for threshold in policy.thresholds if self.latency > threshold)
+        if target > level:
+            self.set_level(target)
+        elif (level > FULL
+                and self.latency < policy.thresholds[level - 1] * policy.recover
+                and self._clock() - self.changed >= policy.hold):
+            self.set_level(level - 1)
+
+    def set_level(self, level):
+        old = self.level
+        if level == old:
+            return
+        converter = self.converter
+        if level >= STRIP and old < STRIP and self._convert:
+            converter.reset_all()
+            converter.convert, converter.strip = False, True
+        elif level < STRIP <= old:
+            converter.convert, converter.strip = self._convert, self._strip
+        self.level = level
+        self.changed = self._clock()
+        if level < COALESCE <= old:
+            self.emit(observe=False)
+        if level < DROP_ANIMATION <= old:
+            self.emit_pending()
+        if self.policy.on_transition is not None:
+            self.policy.on_transition(converter, old, level, self.latency)
+
+    def emit_pending(self):
+        pending, self.pending = self.pending, None
+        if pending is not None:
+            self.emit_text(pending)
+
+    def emit_text(self, text):
+        if self.level >= COALESCE:
+            self.buffer(text)
+        else:
+            self.timed(self.converter_write, text)
+
+    def timed(self, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        self.observe(time.perf_counter() - start)
+
+    def buffer(self, text):
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered += len(text)
+            now = self._clock()
+            if (self._buffered >= self.policy.coalesce_size
+                    or now - self._last_emit >= self.policy.coalesce_interval):
+                self.emit()
+            elif self._timer is None:
+                delay = self.policy.coalesce_interval - (now - self._last_emit)
+                self._timer = threading.Timer(delay, self.emit)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def emit(self, observe=True):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_emit = self._clock()
+            if not self._buffer:
+                return
+            text = ''.join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            if observe:
+                self.timed(self.converter_write, text)
+            else:
+                self.converter_write(text)
+
+    def write(self, text):
+        with self._lock:
+            if (self.level >= DROP_ANIMATION and '\n' not in text
+                    and ANIMATION_RE.match(text)):
+                if self.pending is not None:
+                    self.dropped += 1
+                self.pending = text
+                return
+            self.emit_pending()
+            self.emit_text(text)
+
+    def flush(self):
+        with self._lock:
+            self.emit_pending()
+            self.emit()
+            self.timed(self.converter_flush)
+
+
+def adapt(converter, policy):
+    adapter = Adapter(converter, policy)
+    adapter.converter_write = converter.write
+    adapter.converter_flush = converter.flush
+    converter.write = adapter.write
+    converter.flush = adapter.flush
+    return adapter
@@ -3,6 +3,8 @@ CSI = '\033['
 OSC = '\033]'
 BEL = '\a'
 
+_no_color = False
+
 
 def code_to_chars(code):
     return CSI + str(code) + 'm'
@@ -16,6 +18,9 @@ def clear_screen(mode=2):
 def clear_line(mode=2):
     return CSI + str(mode) + 'K'
 
+def _no_code(*args, **kwargs):
+    return ''
+
 
 class AnsiCodes:
     def __init__(self):
@@ -24,6 +29,12 @@ class AnsiCodes:
                 value = getattr(self, name)
                 setattr(self, name, code_to_chars(value))
 
+    def _set_enabled(self, enabled):
+        for name in dir(type(self)):
+            if not name.startswith('_'):
+                value = getattr(type(self), name)
+                setattr(self, name, code_to_chars(value) if enabled else '')
+
 
 class AnsiCursor:
     def UP(self, n=1):
@@ -36,6 +47,26 @@ class AnsiCursor:
         return CSI + str(n) + 'D'
     def POS(self, x=1, y=1):
         return CSI + str(y) + ';' + str(x) + 'H'
+    def SAVE(self):
+        return CSI + 's'
+    def RESTORE(self):
+        return CSI + 'u'
+    def SCROLL_UP(self, n=1):
+        return CSI + str(n) + 'S'
+    def SCROLL_DOWN(self, n=1):
+        return CSI + str(n) + 'T'
+    def SET_SCROLL_REGION(self, top=None, bottom=None):
+        if top is None and bottom is None:
+            return CSI + 'r'
+        return CSI + str(top or 1) + ';' + (str(bottom) if bottom else '') + 'r'
+
+    def _set_enabled(self, enabled):
+        for name in dir(type(self)):
+            if not name.startswith('_'):
+                if enabled:
+                    self.__dict__.pop(name, None)
+                else:
+                    setattr(self, name, _no_code)
 
 
 class AnsiFore(AnsiCodes):
@@ -90,3 +121,13 @@ Fore   = AnsiFore()
 Back   = AnsiBack()
 Style  = AnsiStyle()
 Cursor = AnsiCursor()
+
+
+def set_no_color(enabled=True):
+    global _no_color
+    _no_color = enabled
+    for codes in (Fore, Back, Style, Cursor):
+        codes._set_enabled(not enabled)
+
+def no_color_enabled():
+    return _no_color
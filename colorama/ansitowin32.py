@@ -2,9 +2,11 @@ import re
 import sys
 import os
 
-from .ansi import AnsiFore, AnsiBack, AnsiStyle, Style, BEL
+from .ansi import AnsiFore, AnsiBack, AnsiStyle, Style, BEL, no_color_enabled
 from .winterm import enable_vt_processing, WinTerm, WinColor, WinStyle
 from .win32 import windll, winapi_test
+from .instrument import instrument, stats as global_stats
+from .tracebuffer import trace_converter, trace as global_trace, enable as enable_trace
 
 
 winterm = None
@@ -36,6 +38,9 @@ class StreamWrapper:
     def write(self, text):
         self.__convertor.write(text)
 
+    def flush(self):
+        self.__convertor.flush()
+
     def isatty(self):
         stream = self.__wrapped
         if 'PYCHARM_HOSTED' in os.environ:
@@ -59,14 +64,22 @@ class StreamWrapper:
 
 class AnsiToWin32:
 
-    ANSI_CSI_RE = re.compile('\001?\033\\[((?:\\d|;)*)([a-zA-Z])\002?')
-    ANSI_OSC_RE = re.compile('\001?\033\\]([^\a]*)(\a)\002?')
+    ANSI_CSI_RE = re.compile('\001?\033\\[(\\??(?:\\d|;)*)([a-zA-Z])\002?')
+    ALTERNATE_SCREEN_MODES = frozenset((47, 1047, 1049))
+    ANSI_OSC_RE = re.compile('\001?\033\\]([^\a\033]*)(\a|\033\\\\)\002?')
+    MAX_OSC_LENGTH = 4096
 
-    def __init__(self, wrapped, convert=None, strip=None, autoreset=False):
+    def __init__(self, wrapped, convert=None, strip=None, autoreset=False, batch=False,
+                 stats=None, trace=None, recorder=None, no_color=False, adaptive=None,
+                 collapse_repeats=None, max_osc_length=None, async_writer=None, raw_fd=False):
         self.wrapped = wrapped
 
+        self.max_osc_length = self.MAX_OSC_LENGTH if max_osc_length is None else max_osc_length
+
         self.autoreset = autoreset
 
+        self.batch = batch
+
         self.stream = StreamWrapper(wrapped, self)
 
         on_windows = os.name == 'nt'
@@ -79,6 +92,11 @@ class AnsiToWin32:
         have_tty = not self.stream.closed and self.stream.isatty()
         need_conversion = conversion_supported and not system_has_native_ansi
 
+        self.no_color = no_color
+        if no_color:
+            strip, convert = True, False
+            self.write = self.write_no_color
+
         if strip is None:
             strip = need_conversion or not have_tty
         self.strip = strip
@@ -87,13 +105,57 @@ class AnsiToWin32:
             convert = need_conversion and have_tty
         self.convert = convert
 
+        self.raw = None
+        if raw_fd:
+            from .rawfd import raw_output
+            self.raw = raw_output(wrapped)
+
         self.win32_calls = self.get_win32_calls()
 
         self.on_stderr = self.wrapped is sys.stderr
 
+        self.adaptive = None
+        if adaptive:
+            from .adaptive import AdaptivePolicy, adapt
+            if adaptive is True:
+                adaptive = AdaptivePolicy()
+            self.adaptive = adapt(self, adaptive)
+
+        self.repeats = None
+        if collapse_repeats:
+            from .repeats import collapse_repeats as collapse_converter
+            timeout = 1.0 if collapse_repeats is True else collapse_repeats
+            self.repeats = collapse_converter(self, timeout)
+
+        if stats is True:
+            stats = global_stats()
+        self.stats = stats or None
+        if self.stats is not None:
+            instrument(self, self.stats)
+
+        if trace is True:
+            trace = global_trace() or enable_trace()
+        self.trace = trace or None
+        if self.trace is not None:
+            trace_converter(self, self.trace)
+
+        self.recorder = recorder
+        if recorder is not None:
+            from .asciicast import record_converter
+            record_converter(self, recorder)
+
+        self.async_writer = None
+        if async_writer:
+            from .background import write_in_background
+            maxsize = 10000 if async_writer is True else async_writer
+            self.async_writer = write_in_background(self, maxsize)
+
     def should_wrap(self):
 
-        return self.convert or self.strip or self.autoreset
+        return (self.convert or self.strip or self.autoreset
+                or self.stats is not None or self.recorder is not None
+                or self.adaptive is not None or self.repeats is not None
+                or self.async_writer is not None)
 
     def get_win32_calls(self):
         if self.convert and winterm:
@@ -140,7 +202,12 @@ class AnsiToWin32:
         return dict()
 
     def write(self, text):
-        if self.strip or self.convert:
+        if (self.convert and self.batch and winterm is not None
+                and winterm.scroll_region is None):
+            self.write_and_blit(text)
+        elif self.raw is not None and self.strip and not self.convert:
+            self.write_and_strip_raw(text)
+        elif self.strip or self.convert:
             self.write_and_convert(text)
         else:
             self.wrapped.write(text)
@@ -149,6 +216,14 @@ class AnsiToWin32:
             self.reset_all()
 
 
+    def write_no_color(self, text):
+        if no_color_enabled() and '\033' not in text:
+            self.wrapped.write(text)
+            self.wrapped.flush()
+        else:
+            self.write_and_convert(text)
+
+
     def reset_all(self):
         if self.convert:
             self.call_win32('m', (0,))
@@ -168,14 +243,107 @@ class AnsiToWin32:
         self.write_plain_text(text, cursor, len(text))
 
 
+    def write_and_strip_raw(self, text):
+        data = self.raw.encode(self.convert_osc(text))
+        escapes = 0
+        if b'\033' not in data:
+            segments = [data] if data else []
+        else:
+            view = memoryview(data)
+            segments = []
+            cursor = 0
+            for match in self.raw.ANSI_CSI_RE.finditer(data):
+                start, end = match.span()
+                if cursor < start:
+                    segments.append(view[cursor:start])
+                escapes += 1
+                cursor = end
+            if cursor < len(data):
+                segments.append(view[cursor:])
+        self.write_raw_segments(segments, escapes)
+
+
+    def write_raw_segments(self, segments, escapes):
+        self.wrapped.flush()
+        self.raw.write(segments)
+
+
+    def write_and_blit(self, text):
+        runs = []
+        cursor = 0
+        text = self.convert_osc(text)
+        winterm.begin_batch()
+        try:
+            for match in self.ANSI_CSI_RE.finditer(text):
+                start, end = match.span()
+                if cursor < start:
+                    runs.append((text[cursor:start], winterm.get_attrs()))
+                paramstring, command = match.groups()
+                if command != 'm' and runs:
+                    self.blit_runs(runs)
+                    runs = []
+                self.convert_ansi(paramstring, command)
+                cursor = end
+                if winterm.scroll_region is not None:
+                    break
+            else:
+                if cursor < len(text):
+                    runs.append((text[cursor:], winterm.get_attrs()))
+                if runs:
+                    self.blit_runs(runs)
+                return
+        finally:
+            winterm.end_batch()
+        self.write_and_convert(text[cursor:])
+
+
+    def blit_runs(self, runs):
+        rest = winterm.blit(runs, on_stderr=self.on_stderr)
+        if rest:
+            winterm.end_batch(apply=False)
+            for chunk, attrs in rest:
+                winterm.set_console(attrs=attrs, on_stderr=self.on_stderr)
+                self.write_plain_text(chunk, 0, len(chunk))
+            winterm.begin_batch()
+            winterm.set_console(on_stderr=self.on_stderr)
+
+
     def write_plain_text(self, text, start, end):
         if start < end:
+            if self.convert and winterm is not None and winterm.redirected:
+                self.write_redirected(text[start:end])
+                return
             self.wrapped.write(text[start:end])
             self.wrapped.flush()
+            if self.convert and winterm is not None and winterm.shadow is not None:
+                winterm.advance_cursor(text[start:end])
+
+
+    def write_redirected(self, text):
+        if winterm.scroll_region is None:
+            self.write_console(text)
+            return
+        for index, line in enumerate(text.split('\n')):
+            if index and not winterm.scroll_region_line_feed(on_stderr=self.on_stderr):
+                line = '\n' + line
+            if line:
+                self.write_console(line)
+
+
+    def write_console(self, text):
+        if winterm.screens is not None:
+            winterm.write_text(text, on_stderr=self.on_stderr)
+        else:
+            self.wrapped.write(text)
+            self.wrapped.flush()
+        winterm.advance_cursor(text)
 
 
     def convert_ansi(self, paramstring, command):
         if self.convert:
+            if paramstring[:1] == '?':
+                paramstring = paramstring[1:]
+                command = '?' + command
             params = self.extract_params(command, paramstring)
             self.call_win32(command, params)
 
@@ -190,7 +358,7 @@ class AnsiToWin32:
             if len(params) == 0:
                 if command in 'JKm':
                     params = (0,)
-                elif command in 'ABCD':
+                elif command in 'ABCDST':
                     params = (1,)
 
         return params
@@ -215,20 +383,76 @@ class AnsiToWin32:
             n = params[0]
             x, y = {'A': (0, -n), 'B': (0, n), 'C': (n, 0), 'D': (-n, 0)}[command]
             winterm.cursor_adjust(x, y, on_stderr=self.on_stderr)
+        elif command == 's':
+            winterm.save_cursor(on_stderr=self.on_stderr)
+        elif command == 'u':
+            winterm.restore_cursor(on_stderr=self.on_stderr)
+        elif command in 'ST':
+            n = params[0]
+            winterm.scroll(n if command == 'S' else -n, on_stderr=self.on_stderr)
+        elif command == 'r':
+            top = params[0] if len(params) > 0 and params[0] else None
+            bottom = params[1] if len(params) > 1 and params[1] else None
+            winterm.set_scroll_region(top, bottom, on_stderr=self.on_stderr)
+        elif command in ('?h', '?l'):
+            if self.ALTERNATE_SCREEN_MODES.intersection(params):
+                if command == '?h':
+                    winterm.enter_alternate_screen()
+                else:
+                    winterm.exit_alternate_screen()
 
 
     def convert_osc(self, text):
-        for match in self.ANSI_OSC_RE.finditer(text):
-            start, end = match.span()
-            text = text[:start] + text[end:]
-            paramstring, command = match.groups()
-            if command == BEL:
-                if paramstring.count(";") == 1:
-                    params = paramstring.split(";")
-                    if params[0] in '02':
-                        winterm.set_title(params[1])
-        return text
+        find = text.find
+        start = find('\033]')
+        if start < 0:
+            return text
+        parts = []
+        cursor = 0
+        limit = self.max_osc_length
+        size = len(text)
+        while start >= 0:
+            payload = start + 2
+            esc = find('\033', payload)
+            bel = find(BEL, payload, size if esc < 0 else esc)
+            if bel >= 0:
+                stop, end = bel, bel + 1
+            elif esc >= 0 and text.startswith('\\', esc + 1):
+                stop, end = esc, esc + 2
+            elif esc >= 0:
+                start = find('\033]', esc)
+                continue
+            else:
+                break
+            if stop - payload <= limit:
+                self.convert_osc_command(text[payload:stop])
+            if start > 0 and text[start - 1] == '\001':
+                start -= 1
+            if end < size and text[end] == '\002':
+                end += 1
+            parts.append(text[cursor:start])
+            cursor = end
+            start = find('\033]', end)
+        if not parts:
+            return text
+        parts.append(text[cursor:])
+        return ''.join(parts)
+
+
+    def convert_osc_command(self, paramstring):
+        if winterm is not None and paramstring.count(';') == 1:
+            code, title = paramstring.split(';')
+            if code in '02':
+                winterm.set_title(title)
 
 
     def flush(self):
+        self.flush_title()
         self.wrapped.flush()
+        if self.convert and not self.on_stderr and winterm is not None:
+            winterm.swap_buffers()
+
+
+    def flush_title(self):
+        if winterm is not None:
+            winterm.flush_title()
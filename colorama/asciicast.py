@@ -0,0 +1,101 @@
+import json
+import sys
+import threading
+import time
+
+from . import ansitowin32
+from .terminal import terminal_size
+
+
+class Recorder:
+
+    def __init__(self, file, width=None, height=None, batch_size=256):
+        if width is None or height is None:
+            size = terminal_size()
+            width = width or size.columns
+            height = height or size.lines
+        self.source = file
+        if hasattr(file, 'write'):
+            self.file = file
+            self._owns_file = False
+        else:
+            self.file = open(file, 'w', encoding='utf-8', buffering=64 * 1024)
+            self._owns_file = True
+        self.batch_size = batch_size
+        self._events = []
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.closed = False
+        header = dict(version=2, width=width, height=height, timestamp=int(time.time()))
+        self.file.write(json.dumps(header) + '\n')
+
+    def record(self, text):
+        with self._lock:
+            events = self._events
+            events.append((time.monotonic() - self._start, text))
+            full = len(events) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+            if not events or self.closed:
+                return
+            self.file.write(''.join(
+                '[%.6f, "o", %s]\n' % (elapsed, json.dumps(text, ensure_ascii=False))
+                for elapsed, text in events))
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+def record_converter(converter, recorder):
+    record = recorder.record
+    write = converter.write
+
+    def recording_write(text):
+        record(text)
+        write(text)
+
+    converter.write = recording_write
+
+
+def read_events(file):
+    if not hasattr(file, 'read'):
+        with open(file, encoding='utf-8') as f:
+            yield from read_events(f)
+        return
+    header = json.loads(file.readline())
+    if header.get('version') != 2:
+        raise ValueError('not an asciicast v2 recording')
+    for line in file:
+        if line.strip():
+            elapsed, kind, data = json.loads(line)
+            if kind == 'o':
+                yield elapsed, data
+
+
+def replay(file, stream=None, speed=1.0, convert=None, strip=None):
+    if stream is None:
+        stream = sys.stdout
+    converter = ansitowin32.AnsiToWin32(stream, convert=convert, strip=strip)
+    write = converter.write
+    start = time.monotonic()
+    count = 0
+    for elapsed, text in read_events(file):
+        if speed:
+            delay = elapsed / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        write(text)
+        count += 1
+    converter.flush()
+    return count
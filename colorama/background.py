@@ -0,0 +1,142 @@
+import collections
+import threading
+import weakref
+
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP = 'drop'
+
+POLICIES = (BLOCK, DROP_OLDEST, DROP)
+
+_writers = weakref.WeakSet()
+
+
+class BackgroundWriter:
+
+    def __init__(self, write, flush, maxsize=10000, policy=BLOCK, name='colorama-writer'):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of %s' % ', '.join(POLICIES))
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.write_through = write
+        self.flush_through = flush
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.closed = False
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._settled_changed = threading.Condition(self._lock)
+        self._queued = 0
+        self._settled = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        _writers.add(self)
+
+    def write(self, text):
+        self._put(text)
+
+    def call(self, func):
+        self._put(func)
+
+    def _put(self, item):
+        if threading.current_thread() is self._thread:
+            self._write_items([item])
+            return
+        with self._lock:
+            if not self.closed and len(self._queue) >= self.maxsize:
+                if self.policy == BLOCK:
+                    while len(self._queue) >= self.maxsize and not self.closed:
+                        self._not_full.wait()
+                elif self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                    self._settled += 1
+                else:
+                    self.dropped += 1
+                    return
+            if not self.closed:
+                self._queue.append(item)
+                self._queued += 1
+                self._not_empty.notify()
+                return
+        self._write_items([item])
+
+    def _write_items(self, items):
+        text = []
+        for item in items:
+            if isinstance(item, str):
+                text.append(item)
+                continue
+            if text:
+                self.write_through(''.join(text))
+                text = []
+            item()
+        if text:
+            self.write_through(''.join(text))
+        if self.flush_through is not None:
+            self.flush_through()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self.closed:
+                    self._not_empty.wait()
+                if not self._queue:
+                    return
+                items = list(self._queue)
+                self._queue.clear()
+                self._not_full.notify_all()
+            try:
+                self._write_items(items)
+            except Exception:
+                self.errors += 1
+            finally:
+                with self._lock:
+                    self._settled += len(items)
+                    self.batches += 1
+                    self._settled_changed.notify_all()
+
+    def flush(self, timeout=None):
+        if threading.current_thread() is self._thread:
+            return True
+        with self._lock:
+            target = self._queued
+            return self._settled_changed.wait_for(
+                lambda: self._settled >= target or not self._thread.is_alive(), timeout)
+
+    def close(self, timeout=None):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+
+def write_in_background(converter, maxsize=10000):
+    writer = BackgroundWriter(converter.write, None, maxsize, name='colorama-async-writer')
+    flush = converter.flush
+    def flush_in_background():
+        writer.call(flush)
+        writer.flush()
+    converter.write = writer.write
+    converter.flush = flush_in_background
+    return writer
+
+
+def flush_all():
+    for writer in list(_writers):
+        writer.flush()
+
+
+def close_all():
+    for writer in list(_writers):
+        writer.close()
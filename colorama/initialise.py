@@ -1,8 +1,13 @@
 import atexit
 import contextlib
+import os
 import sys
 
-from .ansitowin32 import AnsiToWin32
+from .ansi import set_no_color
+from .ansitowin32 import AnsiToWin32, StreamWrapper
+from . import ansitowin32
+from .win32 import invalidate_handles
+from . import tracebuffer
 
 
 def _wipe_internal_state_for_tests():
@@ -20,35 +25,127 @@ def _wipe_internal_state_for_tests():
     global fixed_windows_console
     fixed_windows_console = False
 
+    global trace_dump
+    trace_dump = None
+    exit_hooks.clear()
+
+    global no_color_active
+    if no_color_active:
+        set_no_color(False)
+    no_color_active = False
+
     atexit.unregister(reset_all)
 
 
+exit_hooks = []
+no_color_active = False
+
+
 def reset_all():
+    for hook in exit_hooks:
+        hook()
+    if ansitowin32.winterm is not None:
+        ansitowin32.winterm.exit_alternate_screen()
     if AnsiToWin32 is not None:
         AnsiToWin32(orig_stdout).reset_all()
+    if ansitowin32.winterm is not None:
+        ansitowin32.winterm.flush_title()
+
+
+def add_exit_hook(hook, first=False):
+    global atexit_done
+    if first:
+        if hook in exit_hooks:
+            exit_hooks.remove(hook)
+        exit_hooks.insert(0, hook)
+    elif hook not in exit_hooks:
+        exit_hooks.append(hook)
+    if not atexit_done:
+        atexit.register(reset_all)
+        atexit_done = True
 
 
-def init(autoreset=False, convert=None, strip=None, wrap=True):
+def init(autoreset=False, convert=None, strip=None, wrap=True, batch=False,
+         stats=False, trace=False, trace_file=None, record=None, no_color=None,
+         adaptive=False, collapse_repeats=False, title_interval=None, clear_mode=None,
+         double_buffer=None, async_writer=False, raw_fd=False):
+
+    global wrapped_stdout, wrapped_stderr
 
     if not wrap and any([autoreset, convert, strip]):
         raise ValueError('wrap=False conflicts with any other arg=True')
+    if clear_mode is not None and clear_mode not in ansitowin32.WinTerm.CLEAR_MODES:
+        raise ValueError('clear_mode must be one of %s'
+                         % ', '.join(ansitowin32.WinTerm.CLEAR_MODES))
+
+    options = {}
+    if batch:
+        options['batch'] = batch
+    if stats:
+        options['stats'] = stats
+    if adaptive:
+        options['adaptive'] = adaptive
+    if collapse_repeats:
+        from . import repeats
+        options['collapse_repeats'] = collapse_repeats
+        if repeats.close_all not in exit_hooks:
+            exit_hooks.append(repeats.close_all)
+    if raw_fd:
+        options['raw_fd'] = raw_fd
+    if async_writer:
+        from . import background
+        options['async_writer'] = async_writer
+        add_exit_hook(background.close_all, first=True)
+    if trace:
+        buffer = tracebuffer.enable() if trace is True else tracebuffer.enable(trace)
+        options['trace'] = buffer
+        if trace_file is not None:
+            global trace_dump
+            trace_dump = (buffer, trace_file)
+            if dump_trace not in exit_hooks:
+                exit_hooks.append(dump_trace)
+    keep_recorder = None
+    if record is not None:
+        keep_recorder = recorder = active_recorder(record, wrapped_stdout, wrapped_stderr)
+        if recorder is None:
+            from .asciicast import Recorder
+            recorder = Recorder(record)
+        options['recorder'] = recorder
+        if recorder.close not in exit_hooks:
+            exit_hooks.append(recorder.close)
+    if no_color is None:
+        no_color = no_color_from_env()
+    global no_color_active
+    if no_color:
+        options['no_color'] = True
+    if no_color or no_color_active:
+        set_no_color(bool(no_color))
+    no_color_active = bool(no_color)
+
+    if title_interval is not None and ansitowin32.winterm is not None:
+        ansitowin32.winterm.title_interval = title_interval
+    if clear_mode is not None and ansitowin32.winterm is not None:
+        ansitowin32.winterm.clear_mode = clear_mode
+    if double_buffer is not None and ansitowin32.winterm is not None:
+        ansitowin32.winterm.double_buffer = double_buffer
 
-    global wrapped_stdout, wrapped_stderr
     global orig_stdout, orig_stderr
 
+    close_wrapped(wrapped_stdout, wrapped_stderr, keep_recorder)
     orig_stdout = sys.stdout
     orig_stderr = sys.stderr
+    invalidate_handles()
 
     if sys.stdout is None:
         wrapped_stdout = None
     else:
         sys.stdout = wrapped_stdout = \
-            wrap_stream(orig_stdout, convert, strip, autoreset, wrap)
+            wrap_stream(orig_stdout, convert, strip, autoreset, wrap, **options)
     if sys.stderr is None:
         wrapped_stderr = None
     else:
         sys.stderr = wrapped_stderr = \
-            wrap_stream(orig_stderr, convert, strip, autoreset, wrap)
+            wrap_stream(orig_stderr, convert, strip, autoreset, wrap, **options)
 
     global atexit_done
     if not atexit_done:
@@ -56,11 +153,45 @@ def init(autoreset=False, convert=None, strip=None, wrap=True):
         atexit_done = True
 
 
+def converters(*streams):
+    for stream in streams:
+        if isinstance(stream, StreamWrapper):
+            yield stream._StreamWrapper__convertor
+
+
+def active_recorder(record, *streams):
+    for converter in converters(*streams):
+        recorder = converter.recorder
+        if recorder is not None and not recorder.closed and recorder.source == record:
+            return recorder
+    return None
+
+
+def close_wrapped(stdout, stderr, keep_recorder=None):
+    for converter in converters(stdout, stderr):
+        if converter.async_writer is not None:
+            converter.async_writer.close()
+    for converter in converters(stdout, stderr):
+        recorder = converter.recorder
+        if recorder is not None and recorder is not keep_recorder:
+            recorder.close()
+            if recorder.close in exit_hooks:
+                exit_hooks.remove(recorder.close)
+
+
 def deinit():
+    for converter in converters(wrapped_stdout, wrapped_stderr):
+        if converter.async_writer is not None:
+            converter.async_writer.flush()
+    for converter in converters(wrapped_stdout, wrapped_stderr):
+        if converter.recorder is not None:
+            converter.recorder.flush()
     if orig_stdout is not None:
         sys.stdout = orig_stdout
     if orig_stderr is not None:
         sys.stderr = orig_stderr
+    if no_color_active:
+        set_no_color(False)
 
 
 def just_fix_windows_console():
@@ -96,12 +227,31 @@ def reinit():
         sys.stdout = wrapped_stdout
     if wrapped_stderr is not None:
         sys.stderr = wrapped_stderr
+    if no_color_active:
+        set_no_color(True)
+
+
+def no_color_from_env():
+    if os.environ.get('FORCE_COLOR'):
+        return False
+    return bool(os.environ.get('NO_COLOR'))
+
+
+def dump_trace():
+    if trace_dump is None:
+        return
+    buffer, trace_file = trace_dump
+    if hasattr(trace_file, 'write'):
+        buffer.dump(trace_file)
+    else:
+        with open(trace_file, 'w') as f:
+            buffer.dump(f)
 
 
-def wrap_stream(stream, convert, strip, autoreset, wrap):
+def wrap_stream(stream, convert, strip, autoreset, wrap, **options):
     if wrap:
         wrapper = AnsiToWin32(stream,
-            convert=convert, strip=strip, autoreset=autoreset)
+            convert=convert, strip=strip, autoreset=autoreset, **options)
         if wrapper.should_wrap():
             stream = wrapper.stream
     return stream
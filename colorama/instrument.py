@@ -0,0 +1,206 @@
+import time
+from collections import Counter
+
+
+COUNTERS = (
+    'writes',
+    'bytes_in',
+    'bytes_out',
+    'plain_segments',
+    'csi_sequences',
+    'osc_sequences',
+    'flushes',
+    'autoresets',
+)
+
+WIN32_CALL_KINDS = {
+    'm': 'sgr',
+    'J': 'erase_screen',
+    'K': 'erase_line',
+    'H': 'cursor_position',
+    'f': 'cursor_position',
+    'A': 'cursor_move',
+    'B': 'cursor_move',
+    'C': 'cursor_move',
+    'D': 'cursor_move',
+    's': 'cursor_save',
+    'u': 'cursor_restore',
+    'S': 'scroll',
+    'T': 'scroll',
+    'r': 'scroll_region',
+    '?h': 'private_mode',
+    '?l': 'private_mode',
+}
+
+
+class Histogram:
+
+    MIN_EXPONENT = 7
+    BUCKETS = 24
+
+    def __init__(self):
+        self.counts = [0] * (self.BUCKETS + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, seconds):
+        bucket = int(seconds * 1e9).bit_length() - self.MIN_EXPONENT
+        if bucket < 0:
+            bucket = 0
+        elif bucket > self.BUCKETS:
+            bucket = self.BUCKETS
+        self.counts[bucket] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def bounds(self):
+        return [2 ** (self.MIN_EXPONENT + i) / 1e9 for i in range(self.BUCKETS)]
+
+    def as_dict(self):
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.bounds() + [float('inf')], self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return dict(count=self.count, sum=self.sum, buckets=buckets)
+
+
+class Stats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.win32_calls = Counter()
+        self.histograms = {}
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def as_dict(self):
+        return dict(
+            counters=dict(self.counters),
+            win32_calls=dict(self.win32_calls),
+            latency={name: histogram.as_dict()
+                     for name, histogram in sorted(self.histograms.items())},
+        )
+
+    def to_openmetrics(self, prefix='colorama'):
+        lines = []
+        for name, value in self.counters.items():
+            lines.append('# TYPE %s_%s counter' % (prefix, name))
+            lines.append('%s_%s_total %d' % (prefix, name, value))
+        lines.append('# TYPE %s_win32_calls counter' % prefix)
+        for kind, value in sorted(self.win32_calls.items()):
+            lines.append('%s_win32_calls_total{kind="%s"} %d' % (prefix, kind, value))
+        lines.append('# TYPE %s_latency_seconds histogram' % prefix)
+        lines.append('# UNIT %s_latency_seconds seconds' % prefix)
+        for name, histogram in sorted(self.histograms.items()):
+            summary = histogram.as_dict()
+            for bound, cumulative in summary['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_latency_seconds_bucket{op="%s",le="%s"} %d'
+                             % (prefix, name, le, cumulative))
+            lines.append('%s_latency_seconds_count{op="%s"} %d'
+                         % (prefix, name, summary['count']))
+            lines.append('%s_latency_seconds_sum{op="%s"} %r'
+                         % (prefix, name, summary['sum']))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+_stats = Stats()
+
+
+def stats():
+    return _stats
+
+
+def instrument(converter, stats):
+    clock = time.perf_counter
+    counters = stats.counters
+    win32_calls = stats.win32_calls
+    write_latency = stats.histogram('write')
+    flush_latency = stats.histogram('flush')
+
+    write = converter.write
+    write_plain_text = converter.write_plain_text
+    blit_runs = converter.blit_runs
+    write_raw_segments = converter.write_raw_segments
+    convert_ansi = converter.convert_ansi
+    convert_osc_command = converter.convert_osc_command
+    call_win32 = converter.call_win32
+    flush = converter.flush
+
+    def instrumented_write(text):
+        counters['writes'] += 1
+        counters['bytes_in'] += len(text)
+        if not (converter.strip or converter.convert):
+            counters['bytes_out'] += len(text)
+            counters['flushes'] += 1
+        if converter.autoreset:
+            counters['autoresets'] += 1
+        start = clock()
+        write(text)
+        write_latency.add(clock() - start)
+
+    blitting = False
+
+    def instrumented_write_plain_text(text, start, end):
+        if start < end:
+            if not blitting:
+                counters['plain_segments'] += 1
+                counters['bytes_out'] += end - start
+            counters['flushes'] += 1
+        write_plain_text(text, start, end)
+
+    def instrumented_blit_runs(runs):
+        nonlocal blitting
+        counters['plain_segments'] += len(runs)
+        counters['bytes_out'] += sum(len(text) for text, _ in runs)
+        blitting = True
+        try:
+            blit_runs(runs)
+        finally:
+            blitting = False
+
+    def instrumented_write_raw_segments(segments, escapes):
+        counters['plain_segments'] += len(segments)
+        counters['bytes_out'] += sum(map(len, segments))
+        counters['csi_sequences'] += escapes
+        counters['flushes'] += 1
+        write_raw_segments(segments, escapes)
+
+    def instrumented_convert_ansi(paramstring, command):
+        counters['csi_sequences'] += 1
+        convert_ansi(paramstring, command)
+
+    def instrumented_convert_osc_command(paramstring):
+        counters['osc_sequences'] += 1
+        convert_osc_command(paramstring)
+
+    def instrumented_call_win32(command, params):
+        kind = WIN32_CALL_KINDS.get(command, command)
+        win32_calls[kind] += len(params) if command == 'm' else 1
+        start = clock()
+        call_win32(command, params)
+        stats.histogram('win32.' + kind).add(clock() - start)
+
+    def instrumented_flush():
+        counters['flushes'] += 1
+        start = clock()
+        flush()
+        flush_latency.add(clock() - start)
+
+    converter.write = instrumented_write
+    converter.write_plain_text = instrumented_write_plain_text
+    converter.blit_runs = instrumented_blit_runs
+    converter.write_raw_segments = instrumented_write_raw_segments
+    converter.convert_ansi = instrumented_convert_ansi
+    converter.convert_osc_command = instrumented_convert_osc_command
+    converter.call_win32 = instrumented_call_win32
+    converter.flush = instrumented_flush
@@ -0,0 +1,156 @@
+import re
+import sys
+import threading
+import time
+
+from .ansi import Cursor, clear_line
+from .terminal import terminal_size
+
+
+CSI_RE = re.compile('\033\\[[\\d;?]*[a-zA-Z]')
+
+
+def clip(text, width):
+    if len(text) <= width:
+        return text
+    parts = []
+    visible = 0
+    cursor = 0
+    for match in CSI_RE.finditer(text):
+        start, end = match.span()
+        take = min(start - cursor, width - visible)
+        parts.append(text[cursor:cursor + take])
+        parts.append(match.group())
+        visible += take
+        cursor = end
+    parts.append(text[cursor:cursor + width - visible])
+    return ''.join(parts)
+
+
+class LiveRegion:
+
+    def __init__(self, height=1, stream=None, max_fps=20):
+        if height < 1:
+            raise ValueError('height must be at least 1')
+        self.height = height
+        self.stream = stream
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self._lines = [''] * height
+        self._shown = None
+        self._logs = []
+        self._last_frame = None
+        self._timer = None
+        self._lock = threading.RLock()
+        self.frames = 0
+        self.dropped = 0
+
+    def _clock(self):
+        return time.monotonic()
+
+    def _stream(self):
+        if self.stream is None:
+            return sys.stdout
+        return self.stream
+
+    def _columns(self):
+        stream = self._stream()
+        try:
+            if not stream.isatty():
+                return None
+        except (AttributeError, ValueError):
+            return None
+        size = terminal_size(stream, fallback=None)
+        return None if size is None else size.columns
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __setitem__(self, index, text):
+        self.set_line(index, text)
+
+    def __getitem__(self, index):
+        return self._lines[index]
+
+    def set_line(self, index, text):
+        with self._lock:
+            self._lines[index] = text
+            self._schedule()
+
+    def update(self, lines):
+        lines = list(lines)
+        if len(lines) > self.height:
+            raise ValueError('%d lines given for a region of height %d'
+                             % (len(lines), self.height))
+        with self._lock:
+            self._lines = lines + [''] * (self.height - len(lines))
+            self._schedule()
+
+    def log(self, text):
+        with self._lock:
+            self._logs.extend(text.rstrip('\n').split('\n'))
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer is not None:
+            self.dropped += 1
+            return
+        now = self._clock()
+        if self._last_frame is None or now - self._last_frame >= self.interval:
+            self._render(now)
+            return
+        delay = self.interval - (now - self._last_frame)
+        self._timer = threading.Timer(delay, self.refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def refresh(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._render(self._clock())
+
+    def close(self):
+        self.refresh()
+
+    def _render(self, now):
+        frame = self.render_frame()
+        self._last_frame = now
+        if not frame:
+            return
+        stream = self._stream()
+        stream.write(frame)
+        stream.flush()
+        self.frames += 1
+
+    def render_frame(self):
+        lines = self._lines
+        columns = self._columns()
+        if columns:
+            lines = [clip(text, columns - 1) for text in lines]
+        shown = self._shown
+        parts = []
+        if shown is None or self._logs:
+            if shown is not None:
+                parts.append(Cursor.UP(self.height) + '\r')
+            for text in self._logs:
+                parts.append(clear_line() + text + '\n')
+            for text in lines:
+                parts.append(clear_line() + text + '\n')
+            self._logs = []
+        else:
+            changed = [i for i in range(self.height) if lines[i] != shown[i]]
+            if not changed:
+                return ''
+            first, last = changed[0], changed[-1]
+            parts.append(Cursor.UP(self.height - first) + '\r')
+            for i in range(first, last + 1):
+                if lines[i] != shown[i]:
+                    parts.append(clear_line() + lines[i])
+                parts.append('\n')
+            parts.append('\n' * (self.height - 1 - last))
+        self._shown = list(lines)
+        return ''.join(parts)
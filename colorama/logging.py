@@ -0,0 +1,141 @@
+import bisect
+import logging
+import re
+import sys
+
+from .ansi import AnsiFore, AnsiStyle, CSI, code_to_chars, no_color_enabled
+from .ansitowin32 import AnsiToWin32, StreamWrapper
+from .background import BLOCK, BackgroundWriter, close_all
+from .initialise import add_exit_hook
+
+
+LEVEL_STYLES = {
+    logging.DEBUG: (AnsiStyle.DIM,),
+    logging.INFO: (AnsiFore.GREEN,),
+    logging.WARNING: (AnsiFore.YELLOW,),
+    logging.ERROR: (AnsiFore.RED,),
+    logging.CRITICAL: (AnsiFore.RED, AnsiStyle.BRIGHT),
+}
+
+RESET = code_to_chars(AnsiStyle.RESET_ALL)
+
+SGR_RE = re.compile('\033\\[([\\d;]*)m')
+
+LEVELNAME_RE = {
+    '%': re.compile('%\\(levelname\\)[-#0 +]*\\d*(?:\\.\\d+)?s'),
+    '{': re.compile('\\{levelname(?:![rsa])?(?::[^{}]*)?\\}'),
+    '$': re.compile('\\$(?:\\{levelname\\}|levelname\\b)'),
+}
+
+
+def merge_codes(codes):
+    if isinstance(codes, (str, int)):
+        codes = (codes,)
+    params = []
+    for code in codes:
+        if isinstance(code, int):
+            params.append(str(code))
+        else:
+            params.extend(match.group(1) or '0' for match in SGR_RE.finditer(code))
+    if not params:
+        return ''
+    return CSI + ';'.join(params) + 'm'
+
+
+def converter_for(stream, **kwargs):
+    if isinstance(stream, StreamWrapper):
+        return stream._StreamWrapper__convertor
+    return AnsiToWin32(stream, **kwargs)
+
+
+def would_strip(stream):
+    if stream is None:
+        return False
+    converter = converter_for(stream)
+    return converter.strip and not converter.convert
+
+
+class ColorFormatter(logging.Formatter):
+
+    def __init__(self, fmt=None, datefmt=None, style='%', validate=True, *,
+                 level_styles=None, stream=None, **kwargs):
+        super().__init__(fmt, datefmt, style, validate, **kwargs)
+        if level_styles is None:
+            level_styles = LEVEL_STYLES
+        self.style_char = style
+        self.stream = stream
+        self._levels = sorted(level_styles)
+        self._prefixes = [merge_codes(level_styles[level]) for level in self._levels]
+        self._plans = {}
+        self._color = None
+
+    def use_color(self):
+        if no_color_enabled():
+            return False
+        color = self._color
+        if color is None:
+            color = self._color = not would_strip(self.stream)
+        return color
+
+    def plan(self, levelno):
+        plan = self._plans.get(levelno)
+        if plan is not None:
+            return plan
+        index = bisect.bisect_right(self._levels, levelno)
+        prefix = self._prefixes[index - 1] if index else ''
+        plan = self._style
+        if prefix:
+            fmt = self._style._fmt
+            colored, count = LEVELNAME_RE[self.style_char].subn(
+                lambda match: prefix + match.group() + RESET, fmt)
+            if not count:
+                colored = prefix + fmt + RESET
+            kwargs = {}
+            if getattr(self._style, '_defaults', None):
+                kwargs['defaults'] = self._style._defaults
+            plan = type(self._style)(colored, **kwargs)
+        self._plans[levelno] = plan
+        return plan
+
+    def formatMessage(self, record):
+        if not self.use_color():
+            return self._style.format(record)
+        return self.plan(record.levelno).format(record)
+
+
+class BackgroundHandler(logging.Handler):
+
+    terminator = '\n'
+
+    def __init__(self, stream=None, level=logging.NOTSET, maxsize=10000, policy=BLOCK,
+                 convert=None, strip=None):
+        super().__init__(level)
+        if stream is None:
+            stream = sys.stderr
+        self.stream = stream
+        self.converter = converter_for(stream, convert=convert, strip=strip)
+        self.writer = BackgroundWriter(self.converter.write, self.converter.flush,
+                                       maxsize, policy, name='colorama-log-writer')
+        self.setFormatter(ColorFormatter(stream=self.converter.stream))
+        add_exit_hook(close_all, first=True)
+
+    @property
+    def dropped(self):
+        return self.writer.dropped
+
+    def emit(self, record):
+        try:
+            self.writer.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        try:
+            self.writer.close()
+        finally:
+            super().close()
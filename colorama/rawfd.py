@@ -0,0 +1,69 @@
+import codecs
+import os
+import re
+import select
+
+from .ansitowin32 import AnsiToWin32
+
+
+ASCII_COMPATIBLE = frozenset(('utf-8', 'ascii', 'iso8859-1'))
+
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, OSError, ValueError):
+    IOV_MAX = 16
+if IOV_MAX <= 0:
+    IOV_MAX = 16
+
+
+class RawOutput:
+
+    ANSI_CSI_RE = re.compile(AnsiToWin32.ANSI_CSI_RE.pattern.encode('ascii'))
+
+    def __init__(self, fd, encoding, errors):
+        self.fd = fd
+        self.encoding = encoding
+        self.errors = errors
+
+    def encode(self, text):
+        return text.encode(self.encoding, self.errors)
+
+    def write(self, buffers):
+        writev_all(self.fd, buffers)
+
+
+def raw_output(stream):
+    if not hasattr(os, 'writev'):
+        return None
+    try:
+        fd = stream.fileno()
+    except Exception:
+        return None
+    encoding = getattr(stream, 'encoding', None)
+    if not isinstance(encoding, str):
+        return None
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return None
+    if name not in ASCII_COMPATIBLE:
+        return None
+    return RawOutput(fd, encoding, getattr(stream, 'errors', None) or 'strict')
+
+
+def writev_all(fd, buffers):
+    buffers = [buffer for buffer in buffers if len(buffer)]
+    while buffers:
+        batch = buffers[:IOV_MAX]
+        try:
+            written = os.writev(fd, batch)
+        except BlockingIOError:
+            select.select([], [fd], [])
+            continue
+        index = 0
+        while index < len(batch) and written >= len(batch[index]):
+            written -= len(batch[index])
+            index += 1
+        del buffers[:index]
+        if written:
+            buffers[0] = memoryview(buffers[0])[written:]
@@ -0,0 +1,111 @@
+import threading
+import weakref
+
+
+_collapsers = weakref.WeakSet()
+
+
+class RepeatCollapser:
+
+    SUMMARY = '(repeated %d times)\n'
+
+    def __init__(self, write, flush, timeout=1.0):
+        self.write_through = write
+        self.flush_through = flush
+        self.timeout = timeout
+        self.previous = None
+        self.previous_hash = None
+        self.repeats = 0
+        self.collapsed = 0
+        self._partial = []
+        self._resumed = False
+        self._timer = None
+        self._lock = threading.RLock()
+        _collapsers.add(self)
+
+    def write(self, text):
+        with self._lock:
+            out = []
+            start = 0
+            newline = text.find('\n')
+            while newline >= 0:
+                if self._partial:
+                    self._partial.append(text[start:newline])
+                    line = ''.join(self._partial)
+                    self._partial = []
+                else:
+                    line = text[start:newline]
+                if self._resumed:
+                    self._resumed = False
+                    out.append(line + '\n')
+                else:
+                    self._line(line, out)
+                start = newline + 1
+                newline = text.find('\n', start)
+            if start < len(text):
+                self._partial.append(text[start:] if start else text)
+            if out:
+                self.write_through(''.join(out))
+
+    def _line(self, line, out):
+        line_hash = hash(line)
+        if line_hash == self.previous_hash and line == self.previous:
+            self.repeats += 1
+            self.collapsed += 1
+            if self._timer is None and self.timeout:
+                self._timer = threading.Timer(self.timeout, self.summarize)
+                self._timer.daemon = True
+                self._timer.start()
+            return
+        self._summary(out)
+        out.append(line + '\n')
+        self.previous = line
+        self.previous_hash = line_hash
+
+    def _summary(self, out):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        repeats, self.repeats = self.repeats, 0
+        if repeats == 1:
+            out.append(self.previous + '\n')
+        elif repeats:
+            out.append(self.SUMMARY % repeats)
+
+    def summarize(self):
+        with self._lock:
+            out = []
+            self._summary(out)
+            if out:
+                self.write_through(''.join(out))
+
+    def flush(self):
+        with self._lock:
+            if self._partial:
+                out = []
+                self._summary(out)
+                out.extend(self._partial)
+                self._partial = []
+                self._resumed = True
+                self.previous = self.previous_hash = None
+                self.write_through(''.join(out))
+            self.flush_through()
+
+    def close(self):
+        with self._lock:
+            self.summarize()
+            if self._partial:
+                partial, self._partial = ''.join(self._partial), []
+                self.write_through(partial)
+
+
+def collapse_repeats(converter, timeout=1.0):
+    collapser = RepeatCollapser(converter.write, converter.flush, timeout)
+    converter.write = collapser.write
+    converter.flush = collapser.flush
+    return collapser
+
+
+def close_all():
+    for collapser in list(_collapsers):
+        collapser.close()
@@ -0,0 +1,204 @@
+import html
+import json
+import re
+
+from .ansi import AnsiFore, AnsiBack, AnsiStyle
+from .ansitowin32 import AnsiToWin32
+
+
+TEXT = 'text'
+CSI = 'csi'
+OSC = 'osc'
+
+TOKEN_RE = re.compile('%s|%s' % (AnsiToWin32.ANSI_CSI_RE.pattern, AnsiToWin32.ANSI_OSC_RE.pattern))
+
+
+def _names(codes, reset):
+    return {code: None if code == reset else name.lower()
+            for name, code in vars(codes).items() if isinstance(code, int)}
+
+FORE_NAMES = _names(AnsiFore, AnsiFore.RESET)
+BACK_NAMES = _names(AnsiBack, AnsiBack.RESET)
+STYLE_NAMES = {AnsiStyle.BRIGHT: 'bright', AnsiStyle.DIM: 'dim', AnsiStyle.NORMAL: None}
+
+
+def tokenize(text, max_osc_length=AnsiToWin32.MAX_OSC_LENGTH):
+    if '\033' not in text:
+        return [(TEXT, 0, len(text), text, '')] if text else []
+    tokens = []
+    cursor = 0
+    for match in TOKEN_RE.finditer(text):
+        start, end = match.span()
+        paramstring, command, osc, _ = match.groups()
+        if cursor < start:
+            tokens.append((TEXT, cursor, start, text[cursor:start], ''))
+        if command is None:
+            if len(osc) <= max_osc_length:
+                tokens.append((OSC, start, end, osc, ''))
+        else:
+            tokens.append((CSI, start, end, paramstring, command))
+        cursor = end
+    if cursor < len(text):
+        tokens.append((TEXT, cursor, len(text), text[cursor:], ''))
+    return tokens
+
+
+class SgrState:
+
+    def __init__(self):
+        self.fore = self.back = self.style = None
+
+    def update(self, paramstring):
+        for param in [param for param in paramstring.split(';') if param] or ['0']:
+            code = int(param)
+            if code == AnsiStyle.RESET_ALL:
+                self.fore = self.back = self.style = None
+            elif code in FORE_NAMES:
+                self.fore = FORE_NAMES[code]
+            elif code in BACK_NAMES:
+                self.back = BACK_NAMES[code]
+            elif code in STYLE_NAMES:
+                self.style = STYLE_NAMES[code]
+
+    def styled(self):
+        return self.fore is not None or self.back is not None or self.style is not None
+
+
+class Sink:
+
+    needs_tokens = True
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def flush(self):
+        self.stream.flush()
+
+
+class PassthroughSink(Sink):
+
+    needs_tokens = False
+
+    def render(self, text, tokens):
+        self.stream.write(text)
+
+
+class StripSink(Sink):
+
+    def render(self, text, tokens):
+        plain = ''.join([value for kind, _, _, value, _ in tokens if kind is TEXT])
+        if plain:
+            self.stream.write(plain)
+
+
+class ConvertSink(Sink):
+
+    def __init__(self, stream, convert=None, strip=None):
+        super().__init__(stream)
+        self.converter = AnsiToWin32(stream, convert=convert, strip=strip)
+
+    def render(self, text, tokens):
+        converter = self.converter
+        if not (converter.strip or converter.convert):
+            converter.write(text)
+            return
+        for kind, _, _, value, command in tokens:
+            if kind is TEXT:
+                converter.write_plain_text(value, 0, len(value))
+            elif kind is CSI:
+                converter.convert_ansi(value, command)
+            else:
+                converter.convert_osc_command(value)
+
+    def flush(self):
+        self.converter.flush()
+
+
+class HtmlSink(Sink):
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.state = SgrState()
+
+    def classes(self):
+        state = self.state
+        names = []
+        if state.fore is not None:
+            names.append('ansi-' + state.fore)
+        if state.back is not None:
+            names.append('ansi-bg-' + state.back)
+        if state.style is not None:
+            names.append('ansi-' + state.style)
+        return ' '.join(names)
+
+    def render(self, text, tokens):
+        out = []
+        for kind, _, _, value, command in tokens:
+            if kind is TEXT:
+                segment = html.escape(value, quote=False)
+                if self.state.styled():
+                    segment = '<span class="%s">%s</span>' % (self.classes(), segment)
+                out.append(segment)
+            elif kind is CSI and command == 'm' and value[:1] != '?':
+                self.state.update(value)
+        if out:
+            self.stream.write(''.join(out))
+
+
+class JsonSink(Sink):
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.state = SgrState()
+
+    def render(self, text, tokens):
+        out = []
+        state = self.state
+        for kind, _, _, value, command in tokens:
+            if kind is TEXT:
+                event = {'text': value}
+                if state.fore is not None:
+                    event['fore'] = state.fore
+                if state.back is not None:
+                    event['back'] = state.back
+                if state.style is not None:
+                    event['style'] = state.style
+                out.append(json.dumps(event, ensure_ascii=False) + '\n')
+            elif kind is CSI and command == 'm' and value[:1] != '?':
+                state.update(value)
+            elif kind is OSC:
+                out.append(json.dumps({'osc': value}, ensure_ascii=False) + '\n')
+        if out:
+            self.stream.write(''.join(out))
+
+
+class Tee:
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+        self.closed = False
+
+    def write(self, text):
+        tokens = None
+        for sink in self.sinks:
+            if tokens is None and sink.needs_tokens:
+                tokens = tokenize(text)
+            sink.render(text, tokens)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def isatty(self):
+        return bool(self.sinks) and self.sinks[0].stream.isatty()
+
+    def close(self):
+        if not self.closed:
+            self.flush()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+
+
+CHECK_INTERVAL = 0.5
+
+_sizes = {}
+_lock = threading.Lock()
+_watching = False
+_previous_handler = None
+
+
+def _clock():
+    return time.monotonic()
+
+
+def _fileno(stream):
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _query(fd):
+    if fd is not None:
+        try:
+            return os.get_terminal_size(fd)
+        except (OSError, ValueError):
+            pass
+    try:
+        columns = int(os.environ['COLUMNS'])
+        lines = int(os.environ['LINES'])
+    except (KeyError, ValueError):
+        return None
+    return os.terminal_size((columns, lines))
+
+
+def _on_resize(signum, frame):
+    _sizes.clear()
+    if callable(_previous_handler):
+        _previous_handler(signum, frame)
+
+
+def _watch_resizes():
+    global _watching, _previous_handler
+    if _watching:
+        return True
+    import signal
+    resize_signal = getattr(signal, 'SIGWINCH', None)
+    if resize_signal is None or threading.current_thread() is not threading.main_thread():
+        return False
+    try:
+        _previous_handler = signal.signal(resize_signal, _on_resize)
+    except (OSError, ValueError):
+        return False
+    _watching = True
+    return True
+
+
+def invalidate():
+    _sizes.clear()
+
+
+def terminal_size(stream=None, fallback=(80, 24)):
+    if stream is None:
+        stream = sys.stdout
+    fd = _fileno(stream)
+    cached = _sizes.get(fd)
+    if cached is None or _clock() - cached[1] >= CHECK_INTERVAL:
+        with _lock:
+            _watch_resizes()
+            cached = _sizes[fd] = (_query(fd), _clock())
+    size = cached[0]
+    if size is None and fallback is not None:
+        size = os.terminal_size(fallback)
+    return size
@@ -0,0 +1,140 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import time
+from contextlib import ExitStack
+from io import StringIO
+from unittest import TestCase, main
+
+from ..adaptive import AdaptivePolicy, COALESCE, DROP_ANIMATION, FULL, STRIP
+from ..ansitowin32 import AnsiToWin32
+from .fakeconsole import FakeConsole, emulate
+
+
+class SlowStream(StringIO):
+
+    delay = 0.0
+
+    def write(self, text):
+        deadline = time.perf_counter() + self.delay
+        while time.perf_counter() < deadline:
+            pass
+        return super().write(text)
+
+
+class AdaptiveTest(TestCase):
+
+    def setUp(self):
+        self.transitions = []
+        self.output = SlowStream()
+
+    def policy(self, **kwargs):
+        def on_transition(converter, old, new, latency):
+            self.transitions.append((old, new))
+        kwargs.setdefault('on_transition', on_transition)
+        kwargs.setdefault('smoothing', 1.0)
+        return AdaptivePolicy(**kwargs)
+
+    def converter(self, **kwargs):
+        kwargs.setdefault('strip', True)
+        kwargs.setdefault('convert', False)
+        return AnsiToWin32(self.output, **kwargs)
+
+    def testAdaptiveStreamsAreWrapped(self):
+        converter = self.converter(strip=False, adaptive=True)
+        self.assertTrue(converter.should_wrap())
+        self.assertEqual(converter.adaptive.level, FULL)
+
+    def testSwitchesFromConvertToStripWhenConsoleIsSlow(self):
+        console = FakeConsole(latency={'SetConsoleTextAttribute': 0.003})
+        with ExitStack() as stack:
+            stack.enter_context(emulate(console))
+            converter = AnsiToWin32(console.stream, convert=True, strip=True,
+                                    adaptive=self.policy(thresholds=(0.002, 10, 10)))
+            converter.write('\033[31mred\033[0m\n')
+            self.assertEqual(self.transitions, [(FULL, STRIP)])
+            self.assertFalse(converter.convert)
+            calls = console.calls['SetConsoleTextAttribute']
+            converter.write('\033[32mgreen\033[0m\n')
+            self.assertEqual(console.calls['SetConsoleTextAttribute'], calls)
+            self.assertEqual(console.text(1), 'green')
+
+    def testRecoversOneLevelAtATime(self):
+        self.output.delay = 0.003
+        converter = self.converter(adaptive=self.policy(
+            thresholds=(0.001, 0.002, 10), hold=0))
+        converter.write('slow\n')
+        self.assertEqual(converter.adaptive.level, DROP_ANIMATION)
+        self.output.delay = 0
+        converter.write('fast\n')
+        converter.write('fast\n')
+        self.assertEqual(self.transitions,
+                         [(FULL, DROP_ANIMATION), (DROP_ANIMATION, STRIP), (STRIP, FULL)])
+
+    def testHoldDelaysRecovery(self):
+        self.output.delay = 0.003
+        converter = self.converter(adaptive=self.policy(
+            thresholds=(0.001, 10, 10), hold=60))
+        converter.write('slow\n')
+        self.output.delay = 0
+        converter.write('fast\n')
+        self.assertEqual(converter.adaptive.level, STRIP)
+
+    def testDropsAnimationFramesButKeepsTheLatest(self):
+        converter = self.converter(adaptive=self.policy())
+        converter.adaptive.set_level(DROP_ANIMATION)
+        for percent in (10, 20, 30):
+            converter.write('\r%d%%' % percent)
+        self.assertEqual(self.output.getvalue(), '')
+        converter.write('\n')
+        converter.write('\033[2A\033[31mredraw')
+        converter.flush()
+        self.assertEqual(self.output.getvalue(), '\r30%\nredraw')
+        self.assertEqual(converter.adaptive.dropped, 2)
+
+    def testFramesEndingALineAreKept(self):
+        converter = self.converter(adaptive=self.policy())
+        converter.adaptive.set_level(DROP_ANIMATION)
+        for text in ('\r 50%', '\rdone: build finished\n', '\r 10% next', 'tail\n'):
+            converter.write(text)
+        converter.flush()
+        self.assertEqual(self.output.getvalue(),
+                         '\r 50%\rdone: build finished\n\r 10% nexttail\n')
+        self.assertEqual(converter.adaptive.dropped, 0)
+
+    def testCoalescesWritesUntilFlush(self):
+        converter = self.converter(adaptive=self.policy(coalesce_interval=60))
+        converter.adaptive.set_level(COALESCE)
+        converter.write('a\n')
+        converter.write('\033[31mb\n')
+        self.assertEqual(self.output.getvalue(), '')
+        converter.flush()
+        self.assertEqual(self.output.getvalue(), 'a\nb\n')
+
+    def testCoalescedOutputIsWrittenWhenRecovering(self):
+        converter = self.converter(adaptive=self.policy(coalesce_interval=60))
+        converter.adaptive.set_level(COALESCE)
+        converter.write('held\n')
+        converter.adaptive.set_level(FULL)
+        self.assertEqual(self.output.getvalue(), 'held\n')
+
+    def testCoalescedOutputIsWrittenAfterInterval(self):
+        converter = self.converter(adaptive=self.policy(coalesce_interval=0.01))
+        converter.adaptive.set_level(COALESCE)
+        converter.write('later\n')
+        deadline = time.monotonic() + 5
+        while not self.output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.output.getvalue(), 'later\n')
+
+    def testTransitionsAreLoggedByDefault(self):
+        converter = self.converter(adaptive=AdaptivePolicy())
+        with self.assertLogs('colorama', 'WARNING') as logs:
+            converter.adaptive.set_level(STRIP)
+        self.assertIn('degraded from full to strip', logs.output[0])
+
+    def testNeedsOneThresholdPerLevel(self):
+        with self.assertRaises(ValueError):
+            AdaptivePolicy(thresholds=(0.1,))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@
 import sys
 from unittest import TestCase, main
 
-from ..ansi import Back, Fore, Style
+from ..ansi import Back, Cursor, Fore, Style, no_color_enabled, set_no_color
 from ..ansitowin32 import AnsiToWin32
 
 stdout_orig = sys.stdout
@@ -71,6 +71,28 @@ class AnsiTest(TestCase):
         self.assertEqual(Style.NORMAL, '\033[22m')
         self.assertEqual(Style.BRIGHT, '\033[1m')
 
+    def testCursorScrollCodes(self):
+        self.assertEqual(Cursor.SAVE() + Cursor.RESTORE(), '\033[s\033[u')
+        self.assertEqual(Cursor.SCROLL_UP(2), '\033[2S')
+        self.assertEqual(Cursor.SCROLL_DOWN(), '\033[1T')
+        self.assertEqual(Cursor.SET_SCROLL_REGION(2, 24), '\033[2;24r')
+        self.assertEqual(Cursor.SET_SCROLL_REGION(bottom=24), '\033[1;24r')
+        self.assertEqual(Cursor.SET_SCROLL_REGION(), '\033[r')
+
+    def testNoColorBlanksAndRestoresCodes(self):
+        set_no_color()
+        try:
+            self.assertTrue(no_color_enabled())
+            self.assertEqual(Fore.RED + Back.BLUE + Style.BRIGHT + Style.RESET_ALL, '')
+            self.assertEqual(Cursor.UP(3) + Cursor.POS(4, 5), '')
+        finally:
+            set_no_color(False)
+        self.assertFalse(no_color_enabled())
+        self.assertEqual(Fore.RED, '\033[31m')
+        self.assertEqual(Back.LIGHTWHITE_EX, '\033[107m')
+        self.assertEqual(Style.RESET_ALL, '\033[0m')
+        self.assertEqual(Cursor.POS(4, 5), '\033[5;4H')
+
 
 if __name__ == '__main__':
     main()
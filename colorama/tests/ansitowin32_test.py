@@ -1,11 +1,14 @@
 # Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import time
 from io import StringIO, TextIOWrapper
 from unittest import TestCase, main
 from unittest.mock import MagicMock, Mock, patch
 from contextlib import ExitStack
 
+from ..ansi import Cursor, Fore, clear_line, set_no_color, set_title
 from ..ansitowin32 import AnsiToWin32, StreamWrapper
 from ..win32 import ENABLE_VIRTUAL_TERMINAL_PROCESSING
+from .fakeconsole import FakeConsole, emulate
 from .utils import osname
 
 
@@ -237,6 +240,47 @@ class AnsiToWin32Test(TestCase):
                 stream.write(code)
             self.assertEqual(winterm.set_title.call_count, 2)
 
+    def test_osc_string_terminator(self):
+        stream = AnsiToWin32(Mock(), convert=True)
+        with patch('colorama.ansitowin32.winterm') as winterm:
+            self.assertEqual(stream.convert_osc('a\033]2;title\033\\b'), 'ab')
+            winterm.set_title.assert_called_once_with('title')
+
+    def test_osc_payload_length_is_limited(self):
+        stream = AnsiToWin32(Mock(), convert=True, max_osc_length=8)
+        with patch('colorama.ansitowin32.winterm') as winterm:
+            self.assertEqual(stream.convert_osc('\033]2;short\a'), '')
+            text = 'a\033]2;far too long\ab\033]2;ok\a\033]8;;' + 'x' * 50 + '\033\\c'
+            self.assertEqual(stream.convert_osc(text), 'abc')
+            self.assertEqual([c.args[0] for c in winterm.set_title.call_args_list],
+                             ['short', 'ok'])
+
+    def test_osc_scan_is_linear_on_unterminated_input(self):
+        stream = AnsiToWin32(Mock(), convert=True)
+        text = '\033]0;' * 200000
+        start = time.perf_counter()
+        with patch('colorama.ansitowin32.winterm'):
+            self.assertEqual(stream.convert_osc(text), text)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    def test_flush_applies_pending_title(self):
+        console = FakeConsole()
+        with emulate(console) as term:
+            term.title_interval = 60
+            stream = AnsiToWin32(console.stream, convert=True)
+            stream.write('\033]2;first\a\033]2;second\a\033]2;third\a')
+            self.assertEqual(console.title, 'first')
+            stream.flush()
+            self.assertEqual(console.title, 'third')
+            self.assertEqual(console.calls['SetConsoleTitle'], 2)
+
+    def test_osc_stripped_without_console(self):
+        output = StringIO()
+        with patch('colorama.ansitowin32.winterm', None):
+            stream = AnsiToWin32(output, convert=False, strip=True)
+            stream.write('a\033]2;title\ab')
+        self.assertEqual(output.getvalue(), 'ab')
+
     def test_native_windows_ansi(self):
         with ExitStack() as stack:
             def p(a, b):
@@ -282,5 +326,190 @@ class AnsiToWin32Test(TestCase):
             self.assertTrue(stream.should_wrap())
 
 
+class NoColorTest(TestCase):
+
+    def tearDown(self):
+        set_no_color(False)
+
+    def testStripsWhileCodesAreEnabled(self):
+        output = StringIO()
+        converter = AnsiToWin32(output, convert=True, strip=False, no_color=True)
+        self.assertTrue(converter.strip)
+        self.assertFalse(converter.convert)
+        converter.write(Fore.RED + 'red' + Fore.RESET)
+        self.assertEqual(output.getvalue(), 'red')
+
+    def testSkipsStrippingWhenCodesAreDisabled(self):
+        output = StringIO()
+        converter = AnsiToWin32(output, no_color=True, autoreset=True)
+        set_no_color()
+        with patch.object(converter, 'write_and_convert') as write_and_convert:
+            converter.write(Fore.RED + 'plain')
+        self.assertFalse(write_and_convert.called)
+        self.assertEqual(output.getvalue(), 'plain')
+
+    def testStripsCodesCapturedBeforeDisabling(self):
+        red = Fore.RED
+        output = StringIO()
+        converter = AnsiToWin32(output, no_color=True)
+        set_no_color()
+        converter.write(red + 'error\033[0m' + clear_line() + set_title('t'))
+        self.assertEqual(output.getvalue(), 'error')
+
+
+class BatchBlitTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole(width=80, height=300)
+        self.console.window_top = 200
+        self.console.cursor = (0, 200)
+        with ExitStack() as stack:
+            self.term = stack.enter_context(emulate(self.console))
+            self.addCleanup(stack.pop_all().close)
+        self.stream = AnsiToWin32(self.console.stream, convert=True, batch=True)
+        self.console.calls.clear()
+
+    def testColoredLineIsOneBlit(self):
+        self.stream.write('\033[31mred\033[32mgreen\033[0m plain\n')
+        self.assertEqual(self.console.stream.writes, 0)
+        self.assertEqual(self.console.text(200), 'redgreen plain')
+        self.assertEqual(
+            self.console.attributes_at(200, 0, 14),
+            [4] * 3 + [2] * 5 + [7] * 6)
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 1)
+        self.assertEqual(self.console.calls['SetConsoleTextAttribute'], 1)
+        self.assertEqual(self.console.calls['SetConsoleCursorPosition'], 1)
+        self.assertEqual(self.console.cursor, (0, 201))
+
+    def testWrapsAtBufferWidth(self):
+        self.stream.write('x' * 85)
+        self.assertEqual(self.console.text(200), 'x' * 80)
+        self.assertEqual(self.console.text(201), 'x' * 5)
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 2)
+        self.assertEqual(self.console.cursor, (5, 201))
+
+    def testCursorCommandsSplitBatches(self):
+        self.stream.write('ab\033[2Ccd')
+        self.assertEqual(self.console.text(200), 'ab  cd')
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 2)
+
+    def testFallsBackWhenOutputWouldScroll(self):
+        self.console.window_top = 275
+        self.console.cursor = (0, 299)
+        self.stream.write('\033[31mlast\nnext')
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 1)
+        self.assertEqual(self.console.stream.writes, 1)
+        self.assertEqual(self.console.text(298), 'last')
+        self.assertEqual(self.console.text(299), 'next')
+        self.assertEqual(self.console.attributes_at(299, 0, 4), [4] * 4)
+
+    def testFallbackKeepsLaterColorOnTheConsole(self):
+        self.console.window_top = 275
+        self.console.cursor = (0, 299)
+        self.stream.write('0123456789' * 9 + '\033[31m')
+        self.assertEqual(self.term.get_attrs(), 4)
+        self.assertEqual(self.console.attributes, 4)
+
+    def testFallsBackForControlCharacters(self):
+        self.stream.write('a\tb')
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 0)
+        self.assertEqual(self.console.text(200), 'a       b')
+
+
+class ScrollRegionTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole(width=80, height=300, window_height=25)
+        self.console.window_top = 200
+        self.console.cursor = (0, 200)
+        with ExitStack() as stack:
+            stack.enter_context(emulate(self.console))
+            self.addCleanup(stack.pop_all().close)
+        self.stream = AnsiToWin32(self.console.stream, convert=True)
+
+    def testLogAboveStatusLine(self):
+        write = self.stream.write
+        write(Cursor.SET_SCROLL_REGION(1, 24))
+        write(Cursor.SAVE() + Cursor.POS(1, 25) + 'status' + Cursor.RESTORE())
+        self.console.calls.clear()
+        for n in range(30):
+            write('line %d\n' % n)
+        screen = self.console.screen()
+        self.assertEqual(screen[:23], ['line %d' % n for n in range(7, 30)])
+        self.assertEqual(screen[23:], ['', 'status'])
+        self.assertEqual(self.console.window_top, 200)
+        self.assertEqual(self.console.calls['ScrollConsoleScreenBuffer'], 7)
+        self.assertEqual(self.console.calls['WriteConsoleOutput'], 0)
+
+    def testSaveAndRestoreCursor(self):
+        self.stream.write('abc' + Cursor.SAVE() + Cursor.POS(10, 5) + 'x'
+                          + Cursor.RESTORE() + 'd')
+        self.assertEqual(self.console.text(200), 'abcd')
+        self.assertEqual(self.console.text(204), '         x')
+
+    def testScrollUpAndDown(self):
+        self.stream.write('one\ntwo\nthree')
+        self.stream.write(Cursor.SCROLL_UP(1))
+        self.assertEqual(self.console.screen()[:3], ['two', 'three', ''])
+        self.stream.write(Cursor.SCROLL_DOWN(2))
+        self.assertEqual(self.console.screen()[:4], ['', '', 'two', 'three'])
+        self.assertEqual(self.console.cursor, (5, 202))
+
+    def testResettingRegionRestoresLineFeeds(self):
+        self.stream.write(Cursor.SET_SCROLL_REGION(1, 2) + 'a\nb\nc\n')
+        self.assertEqual(self.console.screen()[:2], ['c', ''])
+        self.stream.write(Cursor.SET_SCROLL_REGION() + 'd\ne\n')
+        self.assertEqual(self.console.screen()[:3], ['d', 'e', ''])
+
+    def testBatchModeHonoursRegion(self):
+        stream = AnsiToWin32(self.console.stream, convert=True, batch=True)
+        stream.write(Cursor.SET_SCROLL_REGION(1, 2) + 'a\nb\nc')
+        self.assertEqual(self.console.screen()[:3], ['b', 'c', ''])
+        stream.write(Cursor.SET_SCROLL_REGION())
+
+
+class AlternateScreenTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole(width=80, height=300, window_height=25)
+        self.console.write_text('$ top\n')
+        with ExitStack() as stack:
+            self.term = stack.enter_context(emulate(self.console))
+            self.addCleanup(stack.pop_all().close)
+        self.stream = AnsiToWin32(self.console.stream, convert=True)
+
+    def testAlternateScreenKeepsScrollback(self):
+        self.stream.write('\033[?1049h\033[31mfull screen')
+        active = self.console.active
+        self.assertIsNot(active, self.console)
+        self.assertEqual(active.screen()[0], 'full screen')
+        self.assertEqual(active.attributes_at(0, 0, 4), [4] * 4)
+        self.assertEqual(self.console.text(0), '$ top')
+        self.assertEqual(self.console.stream.writes, 0)
+        self.stream.write('\033[0m\033[?1049l$ ')
+        self.assertIs(self.console.active, self.console)
+        self.assertEqual(self.console.screen()[:2], ['$ top', '$'])
+        self.assertEqual(self.console.buffers, {})
+
+    def testDoubleBufferSwapsOnFlush(self):
+        self.term.double_buffer = True
+        self.stream.write('\033[?1049h')
+        for frame in range(3):
+            self.console.calls.clear()
+            self.stream.write('\033[2J\033[Hframe %d' % frame)
+            self.assertNotEqual(self.console.active.screen()[0], 'frame %d' % frame)
+            self.stream.flush()
+            self.assertEqual(self.console.active.screen()[0], 'frame %d' % frame)
+            self.assertEqual(self.console.calls['SetConsoleActiveScreenBuffer'], 1)
+        self.stream.write('\033[?1049l')
+        self.assertIs(self.console.active, self.console)
+        self.assertEqual(self.console.buffers, {})
+
+    def testPrivateModesAreStripped(self):
+        output = StringIO()
+        AnsiToWin32(output, strip=True, convert=False).write('\033[?25la\033[?1049h')
+        self.assertEqual(output.getvalue(), 'a')
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,124 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import json
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from ..ansi import Fore, Style
+from ..ansitowin32 import AnsiToWin32
+from .. import initialise
+from ..asciicast import Recorder, read_events, replay
+from ..initialise import deinit, init
+
+
+class RecorderTest(TestCase):
+
+    def testRecordsWritesAsAsciicast(self):
+        cast = StringIO()
+        recorder = Recorder(cast, width=100, height=30, batch_size=2)
+        output = StringIO()
+        stream = AnsiToWin32(output, strip=True, convert=False, recorder=recorder).stream
+        stream.write(Fore.RED + 'red')
+        self.assertEqual(len(cast.getvalue().splitlines()), 1)
+        stream.write(Style.RESET_ALL + '\n')
+        recorder.close()
+        lines = cast.getvalue().splitlines()
+        header = json.loads(lines[0])
+        self.assertEqual((header['version'], header['width'], header['height']), (2, 100, 30))
+        events = [json.loads(line) for line in lines[1:]]
+        self.assertEqual([event[1:] for event in events],
+                         [['o', '\033[31mred'], ['o', '\033[0m\n']])
+        self.assertLessEqual(events[0][0], events[1][0])
+        self.assertEqual(output.getvalue(), 'red\n')
+
+    def testRecordingForcesWrapping(self):
+        converter = AnsiToWin32(StringIO(), strip=False, convert=False,
+                                recorder=Recorder(StringIO(), 80, 24))
+        self.assertTrue(converter.should_wrap())
+
+    def testRecordsToPath(self):
+        handle, path = tempfile.mkstemp(suffix='.cast')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        recorder = Recorder(path, 80, 24)
+        recorder.record('abc')
+        recorder.close()
+        self.assertEqual(list(read_events(path)), [(events_time(path), 'abc')])
+
+
+class InitRecordTest(TestCase):
+
+    def setUp(self):
+        self.addCleanup(initialise._wipe_internal_state_for_tests)
+        for name in ('stdout', 'stderr'):
+            patcher = patch.object(sys, name, StringIO())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def path(self):
+        handle, path = tempfile.mkstemp(suffix='.cast')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def recorders(self):
+        return [hook.__self__ for hook in initialise.exit_hooks
+                if isinstance(getattr(hook, '__self__', None), Recorder)]
+
+    def testSamePathKeepsRecordingAcrossCycles(self):
+        path = self.path()
+        for text in ('one', 'two', 'three'):
+            init(record=path)
+            sys.stdout.write(text)
+            deinit()
+        self.assertEqual(len(self.recorders()), 1)
+        initialise.reset_all()
+        self.assertEqual([text for _, text in read_events(path)], ['one', 'two', 'three'])
+
+    def testReplacedRecorderIsClosed(self):
+        first, second = self.path(), self.path()
+        init(record=first)
+        sys.stdout.write('one')
+        recorder = self.recorders()[0]
+        init(record=second)
+        self.assertTrue(recorder.closed)
+        self.assertNotIn(recorder, self.recorders())
+        self.assertEqual([text for _, text in read_events(first)], ['one'])
+        deinit()
+
+
+def events_time(path):
+    with open(path) as f:
+        return json.loads(f.readlines()[1])[0]
+
+
+class ReplayTest(TestCase):
+
+    def cast(self, *events):
+        lines = [json.dumps(dict(version=2, width=80, height=24))]
+        lines += [json.dumps([elapsed, 'o', text]) for elapsed, text in events]
+        return StringIO('\n'.join(lines) + '\n')
+
+    def testReplaysThroughConverter(self):
+        output = StringIO()
+        count = replay(self.cast((0.0, Fore.RED + 'a'), (5.0, 'b\n')),
+                       output, speed=None, strip=True, convert=False)
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue(), 'ab\n')
+
+    def testReplaysAtRecordedSpeed(self):
+        start = time.monotonic()
+        replay(self.cast((0.0, 'a'), (0.05, 'b')), StringIO(), speed=1.0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def testRejectsOtherVersions(self):
+        with self.assertRaises(ValueError):
+            list(read_events(StringIO('{"version": 1}\n')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import sys
+import threading
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from .. import initialise
+from ..ansitowin32 import AnsiToWin32
+from ..background import BLOCK, DROP, DROP_OLDEST, BackgroundWriter, close_all
+from ..initialise import deinit, init
+
+
+class GatedStream(StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.entered.set()
+        self.gate.wait(5)
+        self.writes += 1
+        return super().write(text)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class BackgroundWriterTest(TestCase):
+
+    def writer(self, **kwargs):
+        self.stream = GatedStream()
+        writer = BackgroundWriter(self.stream.write, self.stream.flush, **kwargs)
+        self.addCleanup(writer.close)
+        self.addCleanup(self.stream.gate.set)
+        return writer
+
+    def stall(self, writer):
+        writer.write('first\n')
+        self.assertTrue(self.stream.entered.wait(5))
+
+    def testQueuedTextIsWrittenInBatches(self):
+        writer = self.writer()
+        self.stall(writer)
+        for n in range(100):
+            writer.write('%d\n' % n)
+        self.stream.gate.set()
+        self.assertTrue(writer.flush(5))
+        self.assertEqual(self.stream.getvalue(),
+                         'first\n' + ''.join('%d\n' % n for n in range(100)))
+        self.assertEqual(self.stream.writes, 2)
+        self.assertEqual(self.stream.flushes, 2)
+
+    def testDropNewest(self):
+        writer = self.writer(maxsize=2, policy=DROP)
+        self.stall(writer)
+        for text in 'abcd':
+            writer.write(text)
+        self.stream.gate.set()
+        writer.flush(5)
+        self.assertEqual(self.stream.getvalue(), 'first\nab')
+        self.assertEqual(writer.dropped, 2)
+
+    def testDropOldest(self):
+        writer = self.writer(maxsize=2, policy=DROP_OLDEST)
+        self.stall(writer)
+        for text in 'abcd':
+            writer.write(text)
+        self.stream.gate.set()
+        self.assertTrue(writer.flush(5))
+        self.assertEqual(self.stream.getvalue(), 'first\ncd')
+        self.assertEqual(writer.dropped, 2)
+
+    def testBlockWaitsForRoom(self):
+        writer = self.writer(maxsize=1, policy=BLOCK)
+        self.stall(writer)
+        writer.write('a')
+        blocked = threading.Thread(target=writer.write, args=('b',))
+        blocked.start()
+        blocked.join(0.05)
+        self.assertTrue(blocked.is_alive())
+        self.stream.gate.set()
+        blocked.join(5)
+        writer.flush(5)
+        self.assertEqual(self.stream.getvalue(), 'first\nab')
+        self.assertEqual(writer.dropped, 0)
+
+    def testCloseDrainsQueue(self):
+        writer = self.writer()
+        self.stall(writer)
+        writer.write('queued\n')
+        self.stream.gate.set()
+        close_all()
+        self.assertEqual(self.stream.getvalue(), 'first\nqueued\n')
+        writer.write('late\n')
+        self.assertEqual(self.stream.getvalue(), 'first\nqueued\nlate\n')
+
+    def testRejectsUnknownPolicy(self):
+        with self.assertRaises(ValueError):
+            BackgroundWriter(print, print, policy='spill')
+
+
+class AsyncWriterTest(TestCase):
+
+    def setUp(self):
+        self.stream = GatedStream()
+        self.addCleanup(self.stream.gate.set)
+
+    def converter(self, **kwargs):
+        converter = AnsiToWin32(self.stream, strip=True, convert=False, async_writer=True,
+                                **kwargs)
+        self.addCleanup(converter.async_writer.close)
+        return converter
+
+    def testWriteReturnsBeforeTheStreamIsWritten(self):
+        converter = self.converter()
+        self.assertTrue(converter.should_wrap())
+        for _ in range(3):
+            converter.stream.write('\033[31mred\033[0m\n')
+        self.assertTrue(self.stream.entered.wait(5))
+        self.assertEqual(self.stream.getvalue(), '')
+        self.stream.gate.set()
+        converter.stream.flush()
+        self.assertEqual(self.stream.getvalue(), 'red\n' * 3)
+
+    def testFlushRunsInOrderOnTheWriterThread(self):
+        converter = self.converter()
+        flushed = []
+        self.stream.flush = lambda: flushed.append(
+            (threading.current_thread().name, self.stream.getvalue()))
+        self.stream.gate.set()
+        converter.stream.write('a')
+        converter.stream.flush()
+        self.assertIn(('colorama-async-writer', 'a'), flushed)
+
+    def testInitDrainsOnDeinit(self):
+        self.stream.gate.set()
+        self.addCleanup(initialise._wipe_internal_state_for_tests)
+        self.addCleanup(close_all)
+        with patch.object(sys, 'stdout', self.stream), patch.object(sys, 'stderr', StringIO()):
+            init(async_writer=True)
+            self.assertEqual(initialise.exit_hooks[0], close_all)
+            try:
+                print('hello')
+            finally:
+                deinit()
+            self.assertEqual(self.stream.getvalue(), 'hello\n')
+
+
+if __name__ == '__main__':
+    main()
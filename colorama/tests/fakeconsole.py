@@ -0,0 +1,350 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from unittest.mock import patch
+import io
+import time
+
+
+class COORD:
+
+    def __init__(self, X=0, Y=0):
+        self.X = X
+        self.Y = Y
+
+    def __repr__(self):
+        return 'COORD(%d, %d)' % (self.X, self.Y)
+
+
+class SMALL_RECT:
+
+    def __init__(self, Left=0, Top=0, Right=0, Bottom=0):
+        self.Left = Left
+        self.Top = Top
+        self.Right = Right
+        self.Bottom = Bottom
+
+
+class CONSOLE_SCREEN_BUFFER_INFO:
+
+    def __init__(self, size, cursor, attributes, window):
+        self.dwSize = size
+        self.dwCursorPosition = cursor
+        self.wAttributes = attributes
+        self.srWindow = window
+        self.dwMaximumWindowSize = COORD(window.Right - window.Left + 1,
+                                         window.Bottom - window.Top + 1)
+
+
+class ConsoleStream(io.TextIOBase):
+
+    encoding = 'utf-8'
+
+    def __init__(self, console):
+        self.console = console
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes += 1
+        self.console.write_text(text)
+        return len(text)
+
+    def flush(self):
+        self.flushes += 1
+
+    def isatty(self):
+        return True
+
+
+def _on_buffer(api):
+    # Route a call on a std stream to the screen buffer its handle refers to.
+    def call(self, stream_id, *args, **kwargs):
+        return api(self.buffer_for(stream_id), stream_id, *args, **kwargs)
+    call.__name__ = api.__name__
+    return call
+
+
+# An in-process stand-in for the colorama.win32 module, backed by arrays of
+# character cells. Every API call is counted in `calls`. `latency` (seconds,
+# one float for every call or a dict keyed by API name) is busy-waited inside
+# each call to mimic a slow console. `cells_written` counts the cells touched
+# by the fill, write and scroll calls. Extra screen buffers are FakeConsoles
+# too, sharing `calls`; text written to `stream` always lands in the first one,
+# like output through the original standard handle.
+class FakeConsole:
+
+    STDOUT = -11
+    STDERR = -12
+    ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+    TAB_SIZE = 8
+
+    COORD = COORD
+    SMALL_RECT = SMALL_RECT
+
+    windll = 'fake'
+
+    def __init__(self, width=80, height=300, window_height=25, attributes=7, latency=None):
+        self.width = width
+        self.height = height
+        self.window_height = min(window_height, height)
+        self.window_top = 0
+        self.cursor = (0, 0)
+        self.attributes = attributes
+        self.chars = array('I', [32]) * (width * height)
+        self.attrs = array('H', [attributes]) * (width * height)
+        self.title = ''
+        self.modes = {}
+        self.calls = Counter()
+        self.cells_written = 0
+        self.latency = latency
+        self.stream = ConsoleStream(self)
+        self.std_handles = {self.STDOUT: self.STDOUT, self.STDERR: self.STDERR}
+        self.buffers = {}
+        self.active = self
+        self._next_handle = 1000
+
+    def _call(self, name):
+        self.calls[name] += 1
+        latency = self.latency
+        if latency:
+            if isinstance(latency, dict):
+                latency = latency.get(name, 0)
+            deadline = time.perf_counter() + latency
+            while time.perf_counter() < deadline:
+                pass
+
+    def _window(self):
+        return SMALL_RECT(0, self.window_top, self.width - 1,
+                          self.window_top + self.window_height - 1)
+
+    def _move_cursor(self, x, y):
+        self.cursor = (x, y)
+        if y < self.window_top:
+            self.window_top = y
+        elif y >= self.window_top + self.window_height:
+            self.window_top = y - self.window_height + 1
+
+    def winapi_test(self):
+        return True
+
+    def invalidate_handles(self, stream_id=None):
+        pass
+
+    def GetStdHandle(self, stream_id):
+        self._call('GetStdHandle')
+        return self.std_handles.get(stream_id, stream_id)
+
+    def SetStdHandle(self, stream_id, handle):
+        self._call('SetStdHandle')
+        self.std_handles[stream_id] = handle
+
+    def buffer_for(self, stream_id):
+        return self.buffers.get(self.std_handles.get(stream_id), self)
+
+    def CreateConsoleScreenBuffer(self):
+        self._call('CreateConsoleScreenBuffer')
+        buffer = FakeConsole(self.width, self.window_height, self.window_height,
+                             self.attributes)
+        buffer.calls = self.calls
+        buffer.latency = self.latency
+        self._next_handle += 1
+        self.buffers[self._next_handle] = buffer
+        return self._next_handle
+
+    def SetConsoleActiveScreenBuffer(self, handle):
+        self._call('SetConsoleActiveScreenBuffer')
+        self.active = self.buffers.get(handle, self)
+
+    def CloseHandle(self, handle):
+        self._call('CloseHandle')
+        return int(self.buffers.pop(handle, None) is not None)
+
+    @_on_buffer
+    def GetConsoleScreenBufferInfo(self, stream_id=STDOUT):
+        self._call('GetConsoleScreenBufferInfo')
+        return CONSOLE_SCREEN_BUFFER_INFO(
+            COORD(self.width, self.height), COORD(*self.cursor),
+            self.attributes, self._window())
+
+    @_on_buffer
+    def SetConsoleTextAttribute(self, stream_id, attrs):
+        self._call('SetConsoleTextAttribute')
+        self.attributes = attrs
+        return 1
+
+    @_on_buffer
+    def SetConsoleCursorPosition(self, stream_id, position, adjust=True):
+        self._call('SetConsoleCursorPosition')
+        row, column = position
+        if row <= 0 or column <= 0:
+            return
+        x, y = column - 1, row - 1
+        if adjust:
+            window = self.GetConsoleScreenBufferInfo(self.STDOUT).srWindow
+            x += window.Left
+            y += window.Top
+        if x >= self.width or y >= self.height:
+            return 0
+        self._move_cursor(x, y)
+        return 1
+
+    def _fill_length(self, length, start):
+        offset = start.Y * self.width + start.X
+        return offset, max(0, min(length, self.width * self.height - offset))
+
+    @_on_buffer
+    def FillConsoleOutputCharacter(self, stream_id, char, length, start):
+        self._call('FillConsoleOutputCharacter')
+        offset, length = self._fill_length(length, start)
+        self.chars[offset:offset + length] = array('I', [ord(char)]) * length
+        self.cells_written += length
+        return length
+
+    @_on_buffer
+    def FillConsoleOutputAttribute(self, stream_id, attr, length, start):
+        self._call('FillConsoleOutputAttribute')
+        offset, length = self._fill_length(length, start)
+        self.attrs[offset:offset + length] = array('H', [attr]) * length
+        self.cells_written += length
+        return 1
+
+    @_on_buffer
+    def WriteConsoleOutput(self, stream_id, text, attrs, start):
+        self._call('WriteConsoleOutput')
+        length = min(len(text), self.width - start.X)
+        offset = start.Y * self.width + start.X
+        self.chars[offset:offset + length] = array('I', map(ord, text[:length]))
+        self.attrs[offset:offset + length] = array('H', attrs[:length])
+        self.cells_written += length
+        return 1
+
+    @_on_buffer
+    def ScrollConsoleScreenBuffer(self, stream_id, scroll_rect, clip_rect, dest, char, attr):
+        self._call('ScrollConsoleScreenBuffer')
+        clip = _intersect(clip_rect or SMALL_RECT(0, 0, self.width - 1, self.height - 1),
+                          SMALL_RECT(0, 0, self.width - 1, self.height - 1))
+        source = _intersect(scroll_rect, clip)
+        dx, dy = dest.X - scroll_rect.Left, dest.Y - scroll_rect.Top
+        moved = _intersect(SMALL_RECT(scroll_rect.Left + dx, scroll_rect.Top + dy,
+                                      scroll_rect.Right + dx, scroll_rect.Bottom + dy), clip)
+        rows = {}
+        if moved is not None:
+            for y in range(moved.Top, moved.Bottom + 1):
+                start = (y - dy) * self.width + moved.Left - dx
+                end = start + moved.Right - moved.Left + 1
+                rows[y] = (self.chars[start:end], self.attrs[start:end])
+        touched = 0
+        if source is not None:
+            length = source.Right - source.Left + 1
+            for y in range(source.Top, source.Bottom + 1):
+                start = y * self.width + source.Left
+                self.chars[start:start + length] = array('I', [ord(char)]) * length
+                self.attrs[start:start + length] = array('H', [attr]) * length
+            touched += _area(source)
+        for y, (chars, attrs) in rows.items():
+            start = y * self.width + moved.Left
+            self.chars[start:start + len(chars)] = chars
+            self.attrs[start:start + len(attrs)] = attrs
+        if moved is not None:
+            touched += _area(moved)
+            if source is not None:
+                touched -= _area(_intersect(source, moved))
+        self.cells_written += touched
+        return 1
+
+    @_on_buffer
+    def WriteConsole(self, stream_id, text):
+        self._call('WriteConsole')
+        self.write_text(text)
+        return len(text)
+
+    def SetConsoleTitle(self, title):
+        self._call('SetConsoleTitle')
+        self.title = title
+        return 1
+
+    def GetConsoleMode(self, handle):
+        self._call('GetConsoleMode')
+        return self.modes.get(handle, 0)
+
+    def SetConsoleMode(self, handle, mode):
+        self._call('SetConsoleMode')
+        self.modes[handle] = mode
+
+    def write_text(self, text):
+        x, y = self.cursor
+        width = self.width
+        for char in text:
+            if char == '\n':
+                x = 0
+                y = self._line_feed(y)
+            elif char == '\r':
+                x = 0
+            elif char == '\b':
+                x = max(x - 1, 0)
+            elif char == '\t':
+                x = min((x // self.TAB_SIZE + 1) * self.TAB_SIZE, width - 1)
+            elif char == '\a':
+                pass
+            else:
+                offset = y * width + x
+                self.chars[offset] = ord(char)
+                self.attrs[offset] = self.attributes
+                x += 1
+                if x == width:
+                    x = 0
+                    y = self._line_feed(y)
+        self._move_cursor(x, y)
+
+    def _line_feed(self, y):
+        if y < self.height - 1:
+            return y + 1
+        width = self.width
+        del self.chars[:width]
+        del self.attrs[:width]
+        self.chars.extend(array('I', [32]) * width)
+        self.attrs.extend(array('H', [self.attributes]) * width)
+        return y
+
+    def text(self, row):
+        start = row * self.width
+        return ''.join(map(chr, self.chars[start:start + self.width])).rstrip()
+
+    def attributes_at(self, row, start=0, end=None):
+        if end is None:
+            end = self.width
+        return list(self.attrs[row * self.width + start:row * self.width + end])
+
+    def screen(self):
+        return [self.text(row) for row in
+                range(self.window_top, self.window_top + self.window_height)]
+
+
+def _intersect(a, b):
+    if a is None or b is None:
+        return None
+    rect = SMALL_RECT(max(a.Left, b.Left), max(a.Top, b.Top),
+                      min(a.Right, b.Right), min(a.Bottom, b.Bottom))
+    if rect.Left > rect.Right or rect.Top > rect.Bottom:
+        return None
+    return rect
+
+
+def _area(rect):
+    if rect is None:
+        return 0
+    return (rect.Right - rect.Left + 1) * (rect.Bottom - rect.Top + 1)
+
+
+@contextmanager
+def emulate(console):
+    from ..winterm import WinTerm
+    with patch('colorama.winterm.win32', console):
+        term = WinTerm()
+        try:
+            with patch('colorama.ansitowin32.winterm', term):
+                yield term
+        finally:
+            term.flush_title()
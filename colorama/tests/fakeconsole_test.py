@@ -0,0 +1,56 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import time
+from unittest import TestCase, main
+
+from ..ansi import Back, Cursor, Fore, Style, clear_line, clear_screen, set_title
+from ..ansitowin32 import AnsiToWin32
+from .fakeconsole import FakeConsole, emulate
+
+
+class FakeConsoleTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole(width=20, height=10, window_height=5)
+
+    def convert(self, text):
+        with emulate(self.console):
+            stream = AnsiToWin32(self.console.stream, convert=True)
+            stream.write(text)
+
+    def testConvertedColorsLandInCells(self):
+        self.convert(Fore.RED + 'ab' + Back.BLUE + 'c' + Style.RESET_ALL + 'd')
+        self.assertEqual(self.console.text(0), 'abcd')
+        self.assertEqual(self.console.attributes_at(0, 0, 4), [4, 4, 4 + 16, 7])
+        self.assertEqual(self.console.calls['SetConsoleTextAttribute'], 3)
+        self.assertEqual(self.console.stream.writes, 3)
+
+    def testCursorPositioningAndErase(self):
+        self.convert('hello' + Cursor.POS(3, 2) + 'x' + Cursor.BACK(3) + 'y')
+        self.assertEqual(self.console.text(1), 'y x')
+        self.convert('\r' + clear_line())
+        self.assertEqual(self.console.text(1), '')
+        self.assertEqual(self.console.text(0), 'hello')
+        self.convert(clear_screen())
+        self.assertEqual(self.console.screen(), [''] * 5)
+        self.assertEqual(self.console.cursor, (0, 0))
+
+    def testTitle(self):
+        self.convert(set_title('busy'))
+        self.assertEqual(self.console.title, 'busy')
+
+    def testScrollsWhenOutputReachesBufferEnd(self):
+        self.convert(''.join('line %d\n' % i for i in range(12)))
+        self.assertEqual(self.console.text(0), 'line 3')
+        self.assertEqual(self.console.text(8), 'line 11')
+        self.assertEqual(self.console.cursor, (0, 9))
+        self.assertEqual(self.console.window_top, 5)
+
+    def testLatencyIsInjectedPerCall(self):
+        self.console.latency = {'SetConsoleTextAttribute': 0.002}
+        start = time.perf_counter()
+        self.convert(Fore.RED + Fore.GREEN + Fore.BLUE)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.006)
+
+
+if __name__ == '__main__':
+    main()
@@ -191,16 +191,20 @@ OSC_CASES = [
     ("prefix\033]0;Title\a", "prefix", ["Title"]),
     ("\033]2;\a", "", [""]),
     ("\033]3;Title\a", "", []),
-    ("a\033]0;Title\a b\033]2;Other\a", "a b\033]2;Other\a", ["Title", "Other"]),
-    ("a\033]0;Title\a\033]2;Other\a", "a\033]2;Other\a", ["Title", "Other"]),
-    ("\033]0;Title\a\033]3;Skip\a", "\033]3;Skip\a", ["Title"]),
-    ("X\033]0;Title\aY\033]1;Skip\aZ", "XY\033]1;Skip\aZ", ["Title"]),
-    ("X\033]2;One\aY\033]2;Two\aZ", "XY\033]2;Two\a", ["One", "Two"]),
-    ("X\033]2;One\aY\033]2;Two\a", "XY\033]2;Two\a", ["One", "Two"]),
-    ("\033]0;Title\aX\033]0;Again\a", "X\033]0;Again\a", ["Title", "Again"]),
+    ("a\033]0;Title\a b\033]2;Other\a", "a b", ["Title", "Other"]),
+    ("a\033]0;Title\a\033]2;Other\a", "a", ["Title", "Other"]),
+    ("\033]0;Title\a\033]3;Skip\a", "", ["Title"]),
+    ("X\033]0;Title\aY\033]1;Skip\aZ", "XYZ", ["Title"]),
+    ("X\033]2;One\aY\033]2;Two\aZ", "XYZ", ["One", "Two"]),
+    ("X\033]2;One\aY\033]2;Two\a", "XY", ["One", "Two"]),
+    ("\033]0;Title\aX\033]0;Again\a", "X", ["Title", "Again"]),
     ("No osc here", "No osc here", []),
-    ("edge\033]0;Title\a\033]0;Again\aend", "edge\033]0;Again\a", ["Title", "Again"]),
-    ("edge\033]1;Skip\a\033]2;Ok\aend", "edge\033]2;Ok\aen", ["Ok"]),
+    ("st\033]2;Title\033\\end", "stend", ["Title"]),
+    ("\001\033]0;Title\a\002prompt", "prompt", ["Title"]),
+    ("cut\033]2;Lost \033]2;Kept\aend", "cut\033]2;Lost end", ["Kept"]),
+    ("esc\033]2;Lost \033[31mred", "esc\033]2;Lost \033[31mred", []),
+    ("edge\033]0;Title\a\033]0;Again\aend", "edgeend", ["Title", "Again"]),
+    ("edge\033]1;Skip\a\033]2;Ok\aend", "edgeend", ["Ok"]),
 ]
 
 
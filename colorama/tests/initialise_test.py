@@ -1,10 +1,15 @@
 # Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import os
+import subprocess
 import sys
+from io import StringIO
 from unittest import TestCase, main, skipUnless
 from unittest.mock import patch, Mock
 
+from ..ansi import Fore, Cursor
 from ..ansitowin32 import StreamWrapper
-from ..initialise import init, just_fix_windows_console, _wipe_internal_state_for_tests
+from ..initialise import (
+    init, deinit, reinit, just_fix_windows_console, _wipe_internal_state_for_tests)
 from .utils import osname, replace_by
 
 orig_stdout = sys.stdout
@@ -76,6 +81,9 @@ class InitTest(TestCase):
     def testInitWrapOffIncompatibleWithAutoresetOn(self):
         self.assertRaises(ValueError, lambda: init(autoreset=True, wrap=False))
 
+    def testInitRejectsUnknownClearMode(self):
+        self.assertRaises(ValueError, lambda: init(clear_mode='scrollback'))
+
     @patch('colorama.win32.SetConsoleTextAttribute')
     @patch('colorama.initialise.AnsiToWin32')
     def testAutoResetPassedOn(self, mockATW32, _):
@@ -112,6 +120,46 @@ class InitTest(TestCase):
         self.assertFalse(mockRegister.called)
 
 
+class NoColorTest(TestCase):
+
+    def setUp(self):
+        sys.stdout = StringIO()
+        sys.stderr = StringIO()
+
+    def tearDown(self):
+        _wipe_internal_state_for_tests()
+        sys.stdout = orig_stdout
+        sys.stderr = orig_stderr
+
+    @patch.dict(os.environ, {'NO_COLOR': '', 'FORCE_COLOR': ''})
+    def testInitBlanksCodesUntilDeinit(self):
+        init(no_color=True)
+        self.assertEqual(Fore.RED + Cursor.UP(), '')
+        print(Fore.RED + 'plain')
+        self.assertEqual(sys.stdout.getvalue(), 'plain\n')
+        deinit()
+        self.assertEqual(Fore.RED, '\033[31m')
+        reinit()
+        self.assertEqual(Fore.RED, '')
+        init(no_color=False)
+        self.assertEqual(Fore.RED, '\033[31m')
+
+    @patch.dict(os.environ, {'NO_COLOR': '1', 'FORCE_COLOR': ''})
+    def testNoColorEnvironmentVariable(self):
+        init()
+        self.assertEqual(Fore.RED, '')
+
+    @patch.dict(os.environ, {'NO_COLOR': '1', 'FORCE_COLOR': '1'})
+    def testForceColorWins(self):
+        init()
+        self.assertEqual(Fore.RED, '\033[31m')
+
+    @patch.dict(os.environ, {'NO_COLOR': '1', 'FORCE_COLOR': ''})
+    def testExplicitArgumentOverridesEnvironment(self):
+        init(no_color=False)
+        self.assertEqual(Fore.RED, '\033[31m')
+
+
 class JustFixWindowsConsoleTest(TestCase):
     def _reset(self):
         _wipe_internal_state_for_tests()
@@ -181,5 +229,18 @@ class JustFixWindowsConsoleTest(TestCase):
                     self.assertIs(prev_stderr, sys.stderr)
 
 
+
+class ImportTest(TestCase):
+
+    def testOptionalFeaturesAreNotImported(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        script = ('import sys, colorama; '
+                  'print(" ".join(sorted(name for name in sys.modules if name in %r)))'
+                  % (('json', 'logging', 'select', 'signal', 'weakref',
+                      'colorama.adaptive', 'colorama.asciicast', 'colorama.background',
+                      'colorama.rawfd', 'colorama.repeats'),))
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=root)
+        self.assertEqual(output.decode().strip(), '')
+
 if __name__ == '__main__':
     main()
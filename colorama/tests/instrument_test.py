@@ -0,0 +1,100 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+from io import StringIO
+from unittest import TestCase, main
+
+import colorama
+from ..ansi import Fore, Style, set_title
+from ..ansitowin32 import AnsiToWin32
+from ..instrument import Histogram, Stats
+from .fakeconsole import FakeConsole, emulate
+
+
+class StatsTest(TestCase):
+
+    def testDisabledByDefault(self):
+        converter = AnsiToWin32(StringIO())
+        self.assertIsNone(converter.stats)
+        self.assertNotIn('write', vars(converter))
+
+    def testCountsStrippedWrites(self):
+        stats = Stats()
+        output = StringIO()
+        converter = AnsiToWin32(output, strip=True, convert=False, stats=stats)
+        converter.stream.write(Fore.RED + 'red' + Style.RESET_ALL + ' plain\n')
+        converter.stream.flush()
+        counters = stats.counters
+        self.assertEqual(output.getvalue(), 'red plain\n')
+        self.assertEqual(counters['writes'], 1)
+        self.assertEqual(counters['bytes_in'], 19)
+        self.assertEqual(counters['bytes_out'], 10)
+        self.assertEqual(counters['plain_segments'], 2)
+        self.assertEqual(counters['csi_sequences'], 2)
+        self.assertEqual(counters['flushes'], 3)
+        self.assertEqual(stats.histograms['write'].count, 1)
+        self.assertEqual(stats.histograms['flush'].count, 1)
+
+    def testCountsPassthroughAndAutoreset(self):
+        stats = Stats()
+        converter = AnsiToWin32(StringIO(), strip=False, convert=False,
+                                autoreset=True, stats=stats)
+        converter.write('abc')
+        self.assertEqual(stats.counters['bytes_out'], 3)
+        self.assertEqual(stats.counters['autoresets'], 1)
+
+    def testCountsWin32CallsByKind(self):
+        stats = Stats()
+        console = FakeConsole()
+        with emulate(console):
+            converter = AnsiToWin32(console.stream, convert=True, stats=stats)
+            converter.write('\033[1;31mx\033[2J\033[3A' + set_title('t'))
+        self.assertEqual(stats.win32_calls['sgr'], 2)
+        self.assertEqual(stats.win32_calls['erase_screen'], 1)
+        self.assertEqual(stats.win32_calls['cursor_move'], 1)
+        self.assertEqual(stats.counters['osc_sequences'], 1)
+        self.assertEqual(stats.histograms['win32.sgr'].count, 1)
+
+    def testCountsBlittedText(self):
+        stats = Stats()
+        console = FakeConsole(width=10, height=3)
+        console.cursor = (0, 1)
+        with emulate(console):
+            converter = AnsiToWin32(console.stream, convert=True, batch=True, stats=stats)
+            converter.write('\033[31mred\033[32mgreen\n\n' + 'x' * 12)
+        counters = stats.counters
+        self.assertEqual(counters['csi_sequences'], 2)
+        self.assertEqual(counters['plain_segments'], 2)
+        self.assertEqual(counters['bytes_out'], 22)
+
+    def testHistogramBuckets(self):
+        histogram = Histogram()
+        histogram.add(0)
+        histogram.add(1e-6)
+        histogram.add(100)
+        buckets = histogram.as_dict()['buckets']
+        self.assertEqual(buckets[0], (128e-9, 1))
+        self.assertEqual(buckets[-1], (float('inf'), 3))
+        self.assertEqual(histogram.counts[3], 1)
+        self.assertEqual(sum(histogram.counts), 3)
+
+    def testOpenMetricsExport(self):
+        stats = Stats()
+        converter = AnsiToWin32(StringIO(), strip=True, convert=False, stats=stats)
+        converter.write(Fore.RED + 'x')
+        text = stats.to_openmetrics()
+        self.assertIn('colorama_bytes_in_total 6\n', text)
+        self.assertIn('colorama_latency_seconds_count{op="write"} 1\n', text)
+        self.assertIn('colorama_latency_seconds_bucket{op="write",le="+Inf"} 1\n', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+    def testGlobalStats(self):
+        stats = colorama.stats()
+        stats.reset()
+        converter = AnsiToWin32(StringIO(), strip=True, convert=False, stats=True)
+        converter.write('abc')
+        self.assertIs(converter.stats, stats)
+        self.assertEqual(stats.as_dict()['counters']['bytes_in'], 3)
+        stats.reset()
+
+
+if __name__ == '__main__':
+    main()
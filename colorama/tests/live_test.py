@@ -0,0 +1,103 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import os
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from ..ansi import Cursor, clear_line
+from ..live import LiveRegion, clip
+
+
+class LiveRegionTest(TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = patch.object(LiveRegion, '_clock', lambda _: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.region.close()
+
+    def make_region(self, height=3, max_fps=None):
+        self.stream = StringIO()
+        self.region = LiveRegion(height, stream=self.stream, max_fps=max_fps)
+        return self.region
+
+    def take(self):
+        value = self.stream.getvalue()
+        self.stream.seek(0)
+        self.stream.truncate()
+        return value
+
+    def testFirstFrameDrawsAllLines(self):
+        region = self.make_region()
+        region.update(['a', 'b'])
+        self.assertEqual(
+            self.take(),
+            clear_line() + 'a\n' + clear_line() + 'b\n' + clear_line() + '\n')
+
+    def testRedrawsOnlyChangedLines(self):
+        region = self.make_region()
+        region.update(['a', 'b', 'c'])
+        self.take()
+        region[1] = 'B'
+        self.assertEqual(
+            self.take(),
+            Cursor.UP(2) + '\r' + clear_line() + 'B\n' + '\n')
+
+    def testUnchangedFrameWritesNothing(self):
+        region = self.make_region()
+        region.update(['a', 'b', 'c'])
+        self.take()
+        region.update(['a', 'b', 'c'])
+        self.assertEqual(self.take(), '')
+
+    def testLogScrollsAboveRegion(self):
+        region = self.make_region(height=2)
+        region.update(['x', 'y'])
+        self.take()
+        region.log('hello\nworld')
+        self.assertEqual(
+            self.take(),
+            Cursor.UP(2) + '\r' + clear_line() + 'hello\n' +
+            clear_line() + 'world\n' + clear_line() + 'x\n' +
+            clear_line() + 'y\n')
+
+    def testThrottlesAndDropsIntermediateFrames(self):
+        region = self.make_region(height=1, max_fps=10)
+        region[0] = '1'
+        self.take()
+        self.now += 0.01
+        region[0] = '2'
+        region[0] = '3'
+        self.assertEqual(self.take(), '')
+        self.assertEqual(region.dropped, 1)
+        self.now += 0.1
+        region.refresh()
+        self.assertEqual(self.take(), Cursor.UP(1) + '\r' + clear_line() + '3\n')
+        self.assertEqual(region.frames, 2)
+
+    def testClipsLinesToTerminalWidth(self):
+        region = self.make_region(height=1)
+        self.stream.isatty = lambda: True
+        with patch('colorama.live.terminal_size', return_value=os.terminal_size((11, 24))):
+            region.update(['\033[31m' + 'x' * 20 + '\033[0m'])
+        self.assertEqual(self.take(), clear_line() + '\033[31m' + 'x' * 10 + '\033[0m\n')
+
+    def testRejectsTooManyLines(self):
+        region = self.make_region(height=1)
+        with self.assertRaises(ValueError):
+            region.update(['a', 'b'])
+
+
+class ClipTest(TestCase):
+
+    def testClip(self):
+        self.assertEqual(clip('short', 10), 'short')
+        self.assertEqual(clip('ab\033[1mcdef', 3), 'ab\033[1mc')
+        self.assertEqual(clip('abc\033[0m', 2), 'ab\033[0m')
+
+
+if __name__ == '__main__':
+    main()
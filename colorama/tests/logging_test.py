@@ -0,0 +1,136 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import logging
+import sys
+import threading
+from io import StringIO
+from unittest import TestCase, main
+
+from .. import initialise
+from ..ansi import Fore, Style, set_no_color
+from ..ansitowin32 import AnsiToWin32
+from ..background import DROP, close_all
+from ..logging import BackgroundHandler, ColorFormatter, merge_codes
+
+
+def record(level, msg='hello'):
+    return logging.LogRecord('app', level, __file__, 1, msg, None, None)
+
+
+class TtyStream(StringIO):
+
+    def isatty(self):
+        return True
+
+
+class ColorFormatterTest(TestCase):
+
+    def testLevelnameIsColored(self):
+        formatter = ColorFormatter('%(levelname)-8s %(message)s')
+        self.assertEqual(formatter.format(record(logging.WARNING)),
+                         '\033[33mWARNING \033[0m hello')
+        self.assertEqual(formatter.format(record(logging.CRITICAL)),
+                         '\033[31;1mCRITICAL\033[0m hello')
+
+    def testWholeMessageIsColoredWithoutLevelname(self):
+        formatter = ColorFormatter('{name}: {message}', style='{')
+        self.assertEqual(formatter.format(record(logging.ERROR)),
+                         '\033[31mapp: hello\033[0m')
+
+    def testTemplateStyle(self):
+        formatter = ColorFormatter('${levelname} $message', style='$')
+        self.assertEqual(formatter.format(record(logging.INFO)),
+                         '\033[32mINFO\033[0m hello')
+
+    def testCustomLevelsUseTheNextLowerStyle(self):
+        formatter = ColorFormatter('%(message)s', level_styles={
+            logging.INFO: '', logging.ERROR: Fore.RED + Style.BRIGHT})
+        self.assertEqual(formatter.format(record(logging.INFO + 5)), 'hello')
+        self.assertEqual(formatter.format(record(logging.ERROR + 5)),
+                         '\033[31;1mhello\033[0m')
+        self.assertEqual(formatter.format(record(logging.DEBUG)), 'hello')
+
+    def testPlansAreCached(self):
+        formatter = ColorFormatter()
+        self.assertIs(formatter.plan(logging.ERROR), formatter.plan(logging.ERROR))
+        self.assertIs(formatter.plan(logging.DEBUG - 1), formatter._style)
+
+    def testNoColorForStrippedStreams(self):
+        formatter = ColorFormatter('%(levelname)s', stream=StringIO())
+        self.assertEqual(formatter.format(record(logging.ERROR)), 'ERROR')
+        wrapped = AnsiToWin32(TtyStream(), strip=False).stream
+        formatter = ColorFormatter('%(levelname)s', stream=wrapped)
+        self.assertEqual(formatter.format(record(logging.ERROR)), '\033[31mERROR\033[0m')
+
+    def testNoColorMode(self):
+        formatter = ColorFormatter('%(levelname)s')
+        set_no_color()
+        try:
+            self.assertEqual(formatter.format(record(logging.ERROR)), 'ERROR')
+        finally:
+            set_no_color(False)
+
+    def testExceptionTextIsNotColored(self):
+        formatter = ColorFormatter('%(message)s')
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            failure = record(logging.ERROR, 'failed')
+            failure.exc_info = sys.exc_info()
+        text = formatter.format(failure)
+        self.assertTrue(text.startswith('\033[31mfailed\033[0m\nTraceback'))
+
+    def testMergeCodes(self):
+        self.assertEqual(merge_codes(Fore.RED + Style.BRIGHT), '\033[31;1m')
+        self.assertEqual(merge_codes((31, 42)), '\033[31;42m')
+        self.assertEqual(merge_codes(''), '')
+
+
+class ThreadRecordingStream(StringIO):
+
+    def write(self, text):
+        self.thread = threading.current_thread()
+        return super().write(text)
+
+
+class BackgroundHandlerTest(TestCase):
+
+    def setUp(self):
+        self.stream = ThreadRecordingStream()
+        self.logger = logging.getLogger('colorama.tests.background')
+        self.logger.propagate = False
+        self.addCleanup(initialise._wipe_internal_state_for_tests)
+
+    def handler(self, **kwargs):
+        handler = BackgroundHandler(self.stream, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def testRecordsAreWrittenOnTheWriterThread(self):
+        handler = self.handler()
+        self.logger.warning('disk %d%% full', 91)
+        handler.flush()
+        self.assertEqual(self.stream.getvalue(), 'disk 91% full\n')
+        self.assertEqual(self.stream.thread.name, 'colorama-log-writer')
+
+    def testColorsForTerminals(self):
+        self.stream.isatty = lambda: True
+        handler = self.handler(convert=False)
+        self.logger.error('boom')
+        handler.flush()
+        self.assertEqual(self.stream.getvalue(), '\033[31mboom\033[0m\n')
+
+    def testDrainedAtExit(self):
+        initialise.add_exit_hook(self.stream.flush)
+        handler = self.handler(policy=DROP)
+        self.assertEqual(initialise.exit_hooks, [close_all, self.stream.flush])
+        for n in range(10):
+            self.logger.warning('%d', n)
+        initialise.reset_all()
+        self.assertEqual(self.stream.getvalue().split(), [str(n) for n in range(10)])
+        self.assertEqual(handler.dropped, 0)
+
+
+if __name__ == '__main__':
+    main()
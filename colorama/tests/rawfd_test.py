@@ -0,0 +1,102 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase, main, skipUnless
+from unittest.mock import patch
+
+from ..ansi import Fore, Style, set_title
+from ..ansitowin32 import AnsiToWin32
+from ..instrument import Stats
+from ..rawfd import raw_output, writev_all
+from ..tracebuffer import TraceBuffer
+
+
+@skipUnless(hasattr(os, 'writev'), 'requires os.writev')
+class WritevAllTest(TestCase):
+
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.read_fd)
+        self.addCleanup(os.close, self.write_fd)
+
+    def testWritesAllBuffersInOrder(self):
+        data = memoryview(b'hello, world')
+        writev_all(self.write_fd, [data[:5], b'', data[5:]])
+        self.assertEqual(os.read(self.read_fd, 100), b'hello, world')
+
+    def testPartialWritesAreResumed(self):
+        calls = []
+        writev = os.writev
+        def short_writev(fd, buffers):
+            calls.append(len(buffers))
+            return writev(fd, [bytes(buffers[0])[:3]])
+        with patch('colorama.rawfd.os.writev', short_writev):
+            writev_all(self.write_fd, [b'abcde', b'fg', b'hijk'])
+        self.assertEqual(os.read(self.read_fd, 100), b'abcdefghijk')
+        self.assertEqual(calls, [3, 3, 2, 1, 1])
+
+    def testBatchesAreLimitedToIovMax(self):
+        sizes = []
+        writev = os.writev
+        def counting_writev(fd, buffers):
+            sizes.append(len(buffers))
+            return writev(fd, buffers)
+        with patch('colorama.rawfd.IOV_MAX', 4), \
+             patch('colorama.rawfd.os.writev', counting_writev):
+            writev_all(self.write_fd, [b'x'] * 10)
+        self.assertEqual(os.read(self.read_fd, 100), b'x' * 10)
+        self.assertEqual(sizes, [4, 4, 2])
+
+
+@skipUnless(hasattr(os, 'writev'), 'requires os.writev')
+class RawStripTest(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.addCleanup(self.file.close)
+        self.converter = AnsiToWin32(self.file, strip=True, convert=False, raw_fd=True)
+
+    def read(self):
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+    def testStripsWithOneWritev(self):
+        self.assertIsNotNone(self.converter.raw)
+        text = (Fore.RED + 'réd' + Style.RESET_ALL + set_title('t') + ' ☃ '
+                + Fore.GREEN + 'green' + Fore.RESET + '\n')
+        with patch('colorama.rawfd.os.writev', wraps=os.writev) as writev:
+            self.converter.write(text)
+        writev.assert_called_once()
+        self.assertEqual(self.read(), 'réd ☃ green\n')
+
+    def testBufferedTextIsWrittenFirst(self):
+        self.file.write('before ')
+        self.converter.write(Fore.RED + 'after')
+        self.assertEqual(self.read(), 'before after')
+
+    def testCountedAndTraced(self):
+        stats, buffer = Stats(), TraceBuffer(8)
+        converter = AnsiToWin32(self.file, strip=True, convert=False, raw_fd=True,
+                                stats=stats, trace=buffer)
+        converter.write(Fore.RED + 'réd' + Style.RESET_ALL + ' plain\n')
+        self.assertEqual(self.read(), 'réd plain\n')
+        counters = stats.counters
+        self.assertEqual(counters['plain_segments'], 2)
+        self.assertEqual(counters['bytes_out'], 11)
+        self.assertEqual(counters['csi_sequences'], 2)
+        self.assertEqual([entry[:4] for entry in buffer.entries()],
+                         [('text', '', (), 4), ('text', '', (), 7)])
+
+    def testOnlyForAsciiCompatibleFiles(self):
+        self.assertIsNone(raw_output(StringIO()))
+        with open(self.path, 'w', encoding='utf-16') as f:
+            self.assertIsNone(raw_output(f))
+        self.assertIsNone(AnsiToWin32(self.file, strip=True, convert=False).raw)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import time
+from io import StringIO
+from unittest import TestCase, main
+
+from ..ansi import Fore
+from ..ansitowin32 import AnsiToWin32
+from ..repeats import close_all
+
+
+class CollapseRepeatsTest(TestCase):
+
+    def setUp(self):
+        self.output = StringIO()
+        self.converter = AnsiToWin32(self.output, strip=False, convert=False,
+                                     collapse_repeats=60)
+
+    def write(self, *texts):
+        for text in texts:
+            self.converter.write(text)
+
+    def testCollapsedStreamsAreWrapped(self):
+        self.assertTrue(self.converter.should_wrap())
+
+    def testSummarizesRunOnChange(self):
+        error = Fore.RED + 'connection refused' + Fore.RESET + '\n'
+        self.write(*[error] * 1000)
+        self.assertEqual(self.output.getvalue(), error)
+        self.write('connected\n')
+        self.assertEqual(self.output.getvalue(),
+                         error + '(repeated 999 times)\nconnected\n')
+        self.assertEqual(self.converter.repeats.collapsed, 999)
+
+    def testStyleIsPartOfTheLine(self):
+        self.write(Fore.RED + 'x\n', Fore.GREEN + 'x\n')
+        self.assertEqual(self.output.getvalue(), Fore.RED + 'x\n' + Fore.GREEN + 'x\n')
+
+    def testSingleRepeatIsWrittenAsIs(self):
+        self.write('a\na\nb\n')
+        self.assertEqual(self.output.getvalue(), 'a\na\nb\n')
+
+    def testLinesSplitAcrossWrites(self):
+        self.write('ret', 'ry\nre', 'try\n', 'retry', '\n', 'done\n')
+        self.assertEqual(self.output.getvalue(), 'retry\n(repeated 2 times)\ndone\n')
+
+    def testPartialLineIsHeldUntilFlush(self):
+        self.write('prompt: ')
+        self.assertEqual(self.output.getvalue(), '')
+        self.converter.flush()
+        self.assertEqual(self.output.getvalue(), 'prompt: ')
+        self.write('answer\n', 'answer\n')
+        self.assertEqual(self.output.getvalue(), 'prompt: answer\nanswer\n')
+
+    def testFlushDoesNotEndARun(self):
+        for _ in range(3):
+            self.write('tick\n')
+            self.converter.flush()
+        self.assertEqual(self.output.getvalue(), 'tick\n')
+
+    def testCloseWritesSummaryAndPartialLine(self):
+        self.write('x\n', 'x\n', 'x\n', 'tail')
+        close_all()
+        self.assertEqual(self.output.getvalue(), 'x\n(repeated 2 times)\ntail')
+
+    def testSummaryAfterTimeout(self):
+        converter = AnsiToWin32(self.output, strip=False, convert=False,
+                                collapse_repeats=0.01)
+        for _ in range(3):
+            converter.write('spam\n')
+        deadline = time.monotonic() + 5
+        while 'repeated' not in self.output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.output.getvalue(), 'spam\n(repeated 2 times)\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from unittest import TestCase, main
+
+from ..ansi import Back, Cursor, Fore, Style, set_title
+from ..ansitowin32 import AnsiToWin32
+from ..background import close_all
+from ..initialise import (
+    colorama_text, deinit, init, reinit, _wipe_internal_state_for_tests)
+from .fakeconsole import FakeConsole, emulate
+
+# Bytes pushed through each soak. The default keeps the suite quick; set
+# COLORAMA_SOAK_BYTES=300000000 or so for a real soak.
+SOAK_BYTES = int(os.environ.get('COLORAMA_SOAK_BYTES', 512 * 1024))
+
+# Allowed growth of traced memory over the whole soak, and of its peak.
+# The peak allowance covers CPython's free lists (up to 2000 tuples of each
+# size, for instance), which fill up between full collections.
+MAX_GROWTH = 64 * 1024
+MAX_PEAK = 1024 * 1024
+WARMUP = 50
+
+CHUNKS = [
+    Fore.RED + 'error' + Fore.RESET + ': something went wrong\n',
+    Style.BRIGHT + Back.BLUE + ' 42% ' + Style.RESET_ALL + '\r',
+    'plain text without any escapes at all, padded out to a full line.....\n',
+    Cursor.UP(2) + Cursor.FORWARD(10) + Fore.GREEN + 'ok' + Cursor.DOWN(2) + '\r\n',
+    '\033[1;31;42mthree params\033[0m \033[38;5;200m256 colors\033[m\n',
+    set_title('soak') + 'titled\n',
+]
+CHUNK_BYTES = sum(map(len, CHUNKS))
+
+
+class NullStream:
+    closed = False
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def gc_objects():
+    gc.collect()
+    return len(gc.get_objects())
+
+
+class SoakTest(TestCase):
+
+    def soak(self, iteration, size=SOAK_BYTES):
+        iterations = max(size // CHUNK_BYTES, 10)
+        for _ in range(WARMUP):
+            iteration()
+        before_objects = gc_objects()
+        for _ in range(WARMUP):
+            iteration()
+        self.assertLessEqual(gc_objects(), before_objects,
+                         'objects retained by iterations')
+
+        tracemalloc.start()
+        try:
+            gc.collect()
+            baseline, _ = tracemalloc.get_traced_memory()
+            for _ in range(iterations):
+                iteration()
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(current - baseline, MAX_GROWTH)
+        self.assertLess(peak - baseline, MAX_PEAK)
+
+    def converter_iteration(self, **kwargs):
+        write = AnsiToWin32(NullStream(), **kwargs).write
+        def iteration():
+            for chunk in CHUNKS:
+                write(chunk)
+        return iteration
+
+    def testPassthrough(self):
+        self.soak(self.converter_iteration(convert=False, strip=False))
+
+    def testStrip(self):
+        self.soak(self.converter_iteration(convert=False, strip=True, autoreset=True))
+
+    def testConvert(self):
+        with emulate(FakeConsole()):
+            self.soak(self.converter_iteration(convert=True, strip=True),
+                      size=SOAK_BYTES // 4)
+
+
+class InitSoakTest(TestCase):
+
+    def setUp(self):
+        self.saved = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = NullStream()
+
+    def tearDown(self):
+        sys.stdout, sys.stderr = self.saved
+        _wipe_internal_state_for_tests()
+
+    def testInitDeinitReinitCycles(self):
+        def iteration():
+            init(strip=True)
+            sys.stdout.write(CHUNKS[0])
+            deinit()
+            reinit()
+            sys.stderr.write(CHUNKS[1])
+            deinit()
+        SoakTest.soak(self, iteration, size=SOAK_BYTES // 16)
+
+    def testAsyncWriterInitDeinitCycles(self):
+        self.addCleanup(close_all)
+        threads = threading.active_count()
+        def iteration():
+            init(async_writer=True)
+            sys.stdout.write(CHUNKS[0])
+            sys.stderr.write(CHUNKS[1])
+            deinit()
+        SoakTest.soak(self, iteration, size=SOAK_BYTES // 64)
+        self.assertLessEqual(threading.active_count(), threads + 2)
+
+    def testColoramaTextContexts(self):
+        def iteration():
+            with colorama_text(strip=True, autoreset=True):
+                for chunk in CHUNKS:
+                    sys.stdout.write(chunk)
+        SoakTest.soak(self, iteration, size=SOAK_BYTES // 4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import json
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from ..ansi import Back, Fore, Style, set_title
+from ..tee import (CSI, OSC, TEXT, ConvertSink, HtmlSink, JsonSink, PassthroughSink,
+                   StripSink, Tee, tokenize)
+
+
+class TokenizeTest(TestCase):
+
+    def testPlainTextIsOneToken(self):
+        text = 'hello'
+        tokens = tokenize(text)
+        self.assertEqual(tokens, [(TEXT, 0, 5, 'hello', '')])
+        self.assertIs(tokens[0][3], text)
+        self.assertEqual(tokenize(''), [])
+
+    def testEscapes(self):
+        text = 'a' + Fore.RED + 'b' + set_title('t') + '\033[?1049h'
+        self.assertEqual(tokenize(text), [
+            (TEXT, 0, 1, 'a', ''),
+            (CSI, 1, 6, '31', 'm'),
+            (TEXT, 6, 7, 'b', ''),
+            (OSC, 7, 13, '2;t', ''),
+            (CSI, 13, 21, '?1049', 'h'),
+        ])
+
+    def testOverlongOscIsDropped(self):
+        text = 'a\033]2;' + 'x' * 20 + '\ab'
+        self.assertEqual(tokenize(text, max_osc_length=10),
+                         [(TEXT, 0, 1, 'a', ''), (TEXT, 26, 27, 'b', '')])
+
+
+class TeeTest(TestCase):
+
+    text = (Fore.RED + 'red' + Style.RESET_ALL + ' <plain> '
+            + Back.BLUE + Style.BRIGHT + 'both' + Style.RESET_ALL + '\n')
+
+    def testEachWriteIsTokenizedOnce(self):
+        console, log = StringIO(), StringIO()
+        tee = Tee(PassthroughSink(console), StripSink(log), HtmlSink(StringIO()))
+        with patch('colorama.tee.tokenize', wraps=tokenize) as spy:
+            tee.write(self.text)
+        spy.assert_called_once_with(self.text)
+        self.assertEqual(console.getvalue(), self.text)
+        self.assertEqual(log.getvalue(), 'red <plain> both\n')
+
+    def testPassthroughOnlyDoesNotTokenize(self):
+        with patch('colorama.tee.tokenize') as spy:
+            Tee(PassthroughSink(StringIO())).write(self.text)
+        spy.assert_not_called()
+
+    def testConvertSinkStripsLikeAnsiToWin32(self):
+        output = StringIO()
+        tee = Tee(ConvertSink(output, convert=False, strip=True))
+        tee.write(self.text + set_title('title'))
+        self.assertEqual(output.getvalue(), 'red <plain> both\n')
+
+    def testConvertSinkPassesThroughWhenNotStripping(self):
+        output = StringIO()
+        Tee(ConvertSink(output, convert=False, strip=False)).write(self.text)
+        self.assertEqual(output.getvalue(), self.text)
+
+    def testHtml(self):
+        output = StringIO()
+        tee = Tee(HtmlSink(output))
+        tee.write(self.text)
+        self.assertEqual(output.getvalue(),
+                         '<span class="ansi-red">red</span> &lt;plain&gt; '
+                         '<span class="ansi-bg-blue ansi-bright">both</span>\n')
+
+    def testStyleCarriesAcrossWrites(self):
+        output = StringIO()
+        tee = Tee(HtmlSink(output))
+        tee.write(Fore.GREEN)
+        tee.write('ok' + Fore.RESET + '!')
+        self.assertEqual(output.getvalue(), '<span class="ansi-green">ok</span>!')
+
+    def testJson(self):
+        output = StringIO()
+        Tee(JsonSink(output)).write(self.text + set_title('title'))
+        events = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(events, [
+            {'text': 'red', 'fore': 'red'},
+            {'text': ' <plain> '},
+            {'text': 'both', 'back': 'blue', 'style': 'bright'},
+            {'text': '\n'},
+            {'osc': '2;title'},
+        ])
+
+    def testCloseFlushesEverySink(self):
+        first, second = StringIO(), StringIO()
+        flushed = []
+        first.flush = lambda: flushed.append('first')
+        second.flush = lambda: flushed.append('second')
+        with Tee(StripSink(first), JsonSink(second)) as tee:
+            tee.write('x')
+        self.assertEqual(flushed, ['first', 'second'])
+        self.assertTrue(tee.closed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import os
+import signal
+from io import StringIO
+from unittest import TestCase, main, skipUnless
+from unittest.mock import Mock, patch
+
+from .. import terminal
+from ..terminal import terminal_size
+
+
+class FakeTerminal(StringIO):
+
+    def fileno(self):
+        return 99
+
+
+class TerminalSizeTest(TestCase):
+
+    def setUp(self):
+        terminal.invalidate()
+        self.addCleanup(terminal.invalidate)
+        self.get_size = Mock(return_value=os.terminal_size((120, 40)))
+        patcher = patch('colorama.terminal.os.get_terminal_size', self.get_size)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testSizeIsCached(self):
+        with patch.object(terminal, '_watch_resizes', lambda: True):
+            for _ in range(100):
+                self.assertEqual(terminal_size(FakeTerminal()), (120, 40))
+        self.get_size.assert_called_once_with(99)
+
+    def testFallbackWhenNotATerminal(self):
+        self.get_size.side_effect = OSError
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(terminal_size(FakeTerminal()), (80, 24))
+            self.assertEqual(terminal_size(StringIO(), fallback=(100, 30)), (100, 30))
+            self.assertIsNone(terminal_size(StringIO(), fallback=None))
+            self.assertEqual(self.get_size.call_count, 1)
+
+    def testEnvironmentIsUsedWhenSizeIsUnknown(self):
+        with patch.dict(os.environ, COLUMNS='132', LINES='43'):
+            self.assertEqual(terminal_size(StringIO()), (132, 43))
+
+    def testRecheckedAfterIntervalWithoutResizeSignal(self):
+        now = [100.0]
+        with patch.object(terminal, '_watch_resizes', lambda: False), \
+             patch.object(terminal, '_clock', lambda: now[0]):
+            terminal_size(FakeTerminal())
+            now[0] += terminal.CHECK_INTERVAL / 2
+            terminal_size(FakeTerminal())
+            self.assertEqual(self.get_size.call_count, 1)
+            self.get_size.return_value = os.terminal_size((100, 30))
+            now[0] += terminal.CHECK_INTERVAL
+            self.assertEqual(terminal_size(FakeTerminal()), (100, 30))
+
+    def testRecheckedAfterIntervalWhileWatching(self):
+        now = [100.0]
+        with patch.object(terminal, '_watch_resizes', lambda: True), \
+             patch.object(terminal, '_clock', lambda: now[0]):
+            terminal_size(FakeTerminal())
+            self.get_size.return_value = os.terminal_size((100, 30))
+            self.assertEqual(terminal_size(FakeTerminal()), (120, 40))
+            now[0] += terminal.CHECK_INTERVAL
+            self.assertEqual(terminal_size(FakeTerminal()), (100, 30))
+
+    @skipUnless(hasattr(signal, 'SIGWINCH'), 'requires SIGWINCH')
+    def testResizeSignalInvalidatesCache(self):
+        previous = Mock()
+        original = signal.signal(signal.SIGWINCH, previous)
+        self.addCleanup(signal.signal, signal.SIGWINCH, original)
+        with patch.object(terminal, '_watching', False), \
+             patch.object(terminal, '_previous_handler', None):
+            terminal_size(FakeTerminal())
+            self.get_size.return_value = os.terminal_size((100, 30))
+            self.assertEqual(terminal_size(FakeTerminal()), (120, 40))
+            signal.raise_signal(signal.SIGWINCH)
+            self.assertEqual(terminal_size(FakeTerminal()), (100, 30))
+        previous.assert_called_once()
+
+
+if __name__ == '__main__':
+    main()
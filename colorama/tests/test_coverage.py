@@ -21,11 +21,18 @@ class FakeKernel32:
             return 1
 
         self.GetStdHandle = stub
+        self.SetStdHandle = stub
         self.GetConsoleScreenBufferInfo = stub
         self.SetConsoleTextAttribute = stub
         self.SetConsoleCursorPosition = stub
         self.FillConsoleOutputCharacterA = stub
         self.FillConsoleOutputAttribute = stub
+        self.WriteConsoleOutputW = stub
+        self.ScrollConsoleScreenBufferW = stub
+        self.WriteConsoleW = stub
+        self.CreateConsoleScreenBuffer = stub
+        self.SetConsoleActiveScreenBuffer = stub
+        self.CloseHandle = stub
         self.SetConsoleTitleW = stub
         self.GetConsoleMode = stub
         self.SetConsoleMode = stub
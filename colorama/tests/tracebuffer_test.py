@@ -0,0 +1,107 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+from io import StringIO
+from unittest import TestCase, main
+
+from ..ansi import Fore, set_title
+from ..ansitowin32 import AnsiToWin32
+from ..initialise import init, deinit, reset_all, _wipe_internal_state_for_tests
+from ..tracebuffer import TraceBuffer, WIN32
+from .fakeconsole import FakeConsole, emulate
+from .utils import replace_by
+
+
+class TraceBufferTest(TestCase):
+
+    def testRecordsConvertedOperations(self):
+        buffer = TraceBuffer(16)
+        console = FakeConsole()
+        with emulate(console):
+            converter = AnsiToWin32(console.stream, convert=True, trace=buffer)
+            converter.write(set_title('busy') + Fore.RED + 'hello\033[2;3H')
+        self.assertEqual(
+            [entry[:4] for entry in buffer.entries()],
+            [
+                ('osc', '', (2,), 4),
+                ('win32', 'm', (31,), 1),
+                ('text', '', (), 5),
+                ('win32', 'H', (2, 3), 2),
+            ])
+
+    def testRecordsPrivateModeCommands(self):
+        buffer = TraceBuffer(16)
+        console = FakeConsole()
+        with emulate(console):
+            converter = AnsiToWin32(console.stream, convert=True, trace=buffer)
+            converter.write('\033[?25l\033[?1049h\033[?1049l')
+        self.assertEqual(
+            [entry[:4] for entry in buffer.entries()],
+            [
+                ('win32', '?l', (25,), 1),
+                ('win32', '?h', (1049,), 1),
+                ('win32', '?l', (1049,), 1),
+            ])
+        output = StringIO()
+        buffer.dump(output)
+        self.assertEqual(output.getvalue().splitlines()[1].split()[1:], ['win32', '?l', '25', '1'])
+
+    def testRecordsBlittedText(self):
+        buffer = TraceBuffer(16)
+        console = FakeConsole()
+        with emulate(console):
+            converter = AnsiToWin32(console.stream, convert=True, batch=True, trace=buffer)
+            converter.write(Fore.RED + 'red' + Fore.GREEN + 'green\n')
+        self.assertEqual(
+            [entry[:4] for entry in buffer.entries()],
+            [
+                ('win32', 'm', (31,), 1),
+                ('win32', 'm', (32,), 1),
+                ('text', '', (), 3),
+                ('text', '', (), 6),
+            ])
+
+    def testUntracedConverterIsUntouched(self):
+        converter = AnsiToWin32(StringIO())
+        self.assertIsNone(converter.trace)
+        self.assertNotIn('call_win32', vars(converter))
+
+    def testKeepsNewestEntries(self):
+        buffer = TraceBuffer(3)
+        for n in range(5):
+            buffer.record(WIN32, ord('m'), (n,))
+        self.assertEqual(buffer.count, 5)
+        self.assertEqual([entry[2] for entry in buffer.entries()], [(2,), (3,), (4,)])
+
+    def testParamsAreBounded(self):
+        buffer = TraceBuffer(1)
+        buffer.record(WIN32, ord('m'), (1, 2, 3, 4, 5, 2 ** 40), 6)
+        kind, command, params, length, _ = next(buffer.entries())
+        self.assertEqual(params, (1, 2, 3, 4))
+        self.assertEqual(length, 6)
+
+    def testDump(self):
+        buffer = TraceBuffer(4)
+        buffer.record(WIN32, ord('m'), (1, 31), 2)
+        output = StringIO()
+        buffer.dump(output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], '# colorama trace: 1 of 1 operations')
+        self.assertEqual(lines[1].split(), ['0.000000', 'win32', 'm', '1;31', '2'])
+
+    def testInitDumpsAtExit(self):
+        output = StringIO()
+        try:
+            with replace_by(StringIO()):
+                init(strip=True, trace=8, trace_file=output)
+                print(Fore.RED + 'x')
+                deinit()
+            reset_all()
+        finally:
+            _wipe_internal_state_for_tests()
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], '# colorama trace: 2 of 2 operations')
+        self.assertEqual([line.split()[1:] for line in lines[1:]],
+                         [['text', '1'], ['text', '1']])
+
+
+if __name__ == '__main__':
+    main()
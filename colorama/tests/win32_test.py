@@ -0,0 +1,84 @@
+# Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
+import ctypes
+import importlib
+from collections import Counter
+from contextlib import contextmanager
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from .. import win32
+
+
+class CountingKernel32:
+
+    def __init__(self):
+        self.calls = Counter()
+        self.std_handles = {win32.STDOUT: 1001, win32.STDERR: 1002}
+
+    def __getattr__(self, name):
+        def api(*args):
+            self.calls[name] += 1
+            if name == 'GetStdHandle':
+                return self.std_handles.get(args[0])
+            if name == 'SetStdHandle':
+                self.std_handles[args[0]] = args[1]
+            return 1
+        setattr(self, name, api)
+        return api
+
+
+@contextmanager
+def stand_in_windll():
+    kernel32 = CountingKernel32()
+    try:
+        with patch.object(ctypes, 'WinDLL', lambda _: kernel32, create=True), \
+             patch.object(ctypes, 'WinError', lambda *_: OSError('winerror'), create=True):
+            yield importlib.reload(win32), kernel32
+    finally:
+        importlib.reload(win32)
+
+
+class HandleCacheTest(TestCase):
+
+    def testHelpersLookUpStdHandleOnce(self):
+        with stand_in_windll() as (api, kernel32):
+            for _ in range(5):
+                api.SetConsoleTextAttribute(api.STDOUT, 7)
+                api.SetConsoleCursorPosition(api.STDOUT, (1, 1), adjust=False)
+                api.FillConsoleOutputAttribute(api.STDOUT, 7, 10, api.COORD(0, 0))
+                api.GetConsoleScreenBufferInfo(api.STDOUT)
+            self.assertEqual(kernel32.calls['GetStdHandle'], 1)
+            self.assertEqual(kernel32.calls['SetConsoleTextAttribute'], 5)
+
+    def testCacheIsKeyedByStreamId(self):
+        with stand_in_windll() as (api, kernel32):
+            self.assertEqual(api.GetStdHandle(api.STDOUT), 1001)
+            self.assertEqual(api.GetStdHandle(api.STDERR), 1002)
+            self.assertEqual(api.GetStdHandle(api.STDOUT), 1001)
+            self.assertEqual(kernel32.calls['GetStdHandle'], 2)
+
+    def testInvalidHandlesAreNotCached(self):
+        with stand_in_windll() as (api, kernel32):
+            kernel32.std_handles[api.STDOUT] = None
+            api.GetStdHandle(api.STDOUT)
+            api.GetStdHandle(api.STDOUT)
+            self.assertEqual(kernel32.calls['GetStdHandle'], 2)
+
+    def testSetStdHandleInvalidatesCache(self):
+        with stand_in_windll() as (api, kernel32):
+            api.GetStdHandle(api.STDOUT)
+            api.SetStdHandle(api.STDOUT, 2001)
+            self.assertEqual(api.GetStdHandle(api.STDOUT), 2001)
+            self.assertEqual(api.GetStdHandle(api.STDERR), 1002)
+
+    def testInvalidateHandles(self):
+        with stand_in_windll() as (api, kernel32):
+            api.GetStdHandle(api.STDOUT)
+            kernel32.std_handles[api.STDOUT] = 3001
+            self.assertEqual(api.GetStdHandle(api.STDOUT), 1001)
+            api.invalidate_handles()
+            self.assertEqual(api.GetStdHandle(api.STDOUT), 3001)
+
+
+if __name__ == '__main__':
+    main()
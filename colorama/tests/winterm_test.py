@@ -1,9 +1,11 @@
 # Copyright Jonathan Hartley 2013. BSD 3-Clause license, see LICENSE file.
 import sys
+import time
 from unittest import TestCase, main, skipUnless
 from unittest.mock import Mock, patch
 
 from ..winterm import WinColor, WinStyle, WinTerm
+from .fakeconsole import FakeConsole
 
 
 class WinTermTest(TestCase):
@@ -123,5 +125,180 @@ class WinTermTest(TestCase):
         )
 
 
+class ShadowCursorTest(TestCase):
+
+    def setUp(self):
+        self.fake = FakeConsole(width=80, height=300)
+        self.fake.window_top = 200
+        self.fake.cursor = (0, 200)
+        patcher = patch('colorama.winterm.win32', self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def moves(self, term):
+        term.set_cursor_position((3, 5))
+        for _ in range(10):
+            term.cursor_adjust(1, 0)
+            term.cursor_adjust(0, 1)
+        term.set_cursor_position((1, 1))
+
+    def testUntrackedMovesQueryConsole(self):
+        term = WinTerm()
+        self.fake.calls.clear()
+        self.moves(term)
+        self.assertEqual(self.fake.calls['GetConsoleScreenBufferInfo'], 22)
+        self.assertEqual(self.fake.cursor, (0, 200))
+
+    def testTrackedMovesSkipConsoleQueries(self):
+        term = WinTerm(track_cursor=True)
+        self.fake.calls.clear()
+        self.moves(term)
+        self.assertEqual(self.fake.calls['GetConsoleScreenBufferInfo'], 1)
+        self.assertEqual(self.fake.calls['SetConsoleCursorPosition'], 22)
+        self.assertEqual(self.fake.cursor, (0, 200))
+
+    def testTrackedPositionMatchesConsole(self):
+        term = WinTerm(track_cursor=True)
+        term.set_cursor_position((3, 5))
+        term.cursor_adjust(2, -1)
+        self.assertEqual(self.fake.cursor, (6, 201))
+        position = term.get_position(self.fake.STDOUT)
+        self.assertEqual((position.X, position.Y), (7, 202))
+
+    def testAdvanceFollowsWrittenText(self):
+        term = WinTerm(track_cursor=True)
+        term.sync_cursor()
+        term.advance_cursor('x' * 85)
+        term.advance_cursor('ab\ncd\r\tz')
+        shadow = term.shadow
+        self.assertEqual((shadow.x, shadow.y), (9, 202))
+
+    def testAdvanceScrollsWindowWithCursor(self):
+        term = WinTerm(track_cursor=True)
+        term.sync_cursor()
+        term.advance_cursor('\n' * 30)
+        self.assertEqual(term.shadow.y, 230)
+        self.assertEqual(term.shadow.top, 206)
+
+    def testUnsafeTextForcesResync(self):
+        term = WinTerm(track_cursor=True)
+        term.sync_cursor()
+        term.advance_cursor('\u4e2d')
+        self.assertFalse(term.shadow.valid)
+        self.fake.calls.clear()
+        term.cursor_adjust(1, 0)
+        self.assertEqual(self.fake.calls['GetConsoleScreenBufferInfo'], 1)
+
+    def testEraseLineUsesShadow(self):
+        term = WinTerm(track_cursor=True)
+        term.sync_cursor()
+        self.fake.calls.clear()
+        term.erase_line(2)
+        term.erase_screen(0)
+        self.assertEqual(self.fake.calls['GetConsoleScreenBufferInfo'], 0)
+
+
+class TitleTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole()
+        patcher = patch('colorama.winterm.win32', self.console)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 100.0
+        self.term = WinTerm(title_interval=1.0)
+        self.term._clock = lambda: self.now
+        self.addCleanup(self.term.flush_title)
+
+    def testFirstTitleIsAppliedAtOnce(self):
+        self.term.set_title('one')
+        self.assertEqual(self.console.title, 'one')
+
+    def testOnlyLatestTitleIsAppliedWithinInterval(self):
+        for n in range(100):
+            self.term.set_title('step %d' % n)
+        self.assertEqual(self.console.title, 'step 0')
+        self.assertEqual(self.console.calls['SetConsoleTitle'], 1)
+        self.term.flush_title()
+        self.assertEqual(self.console.title, 'step 99')
+        self.assertEqual(self.console.calls['SetConsoleTitle'], 2)
+
+    def testTitleIsAppliedOnceIntervalHasPassed(self):
+        self.term.set_title('one')
+        self.now += 0.5
+        self.term.set_title('two')
+        self.now += 0.5
+        self.term.set_title('three')
+        self.assertEqual(self.console.title, 'three')
+        self.term.flush_title()
+        self.assertEqual(self.console.calls['SetConsoleTitle'], 2)
+
+    def testPendingTitleIsAppliedByTimer(self):
+        term = WinTerm(title_interval=0.01)
+        term.set_title('one')
+        term.set_title('two')
+        deadline = time.monotonic() + 5
+        while self.console.title != 'two' and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.console.title, 'two')
+
+
+class ClearModeTest(TestCase):
+
+    def setUp(self):
+        self.console = FakeConsole(width=80, height=9001, window_height=25)
+        patcher = patch('colorama.winterm.win32', self.console)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.console.write_text(''.join('line %d\n' % n for n in range(1000)))
+        self.console.cells_written = 0
+
+    def clear(self, mode, erase=2):
+        term = WinTerm(clear_mode=mode)
+        term.erase_screen(erase)
+        return self.console.cells_written
+
+    def assertScreenCleared(self):
+        self.assertEqual(self.console.screen(), [''] * 25)
+        self.assertEqual(self.console.cursor, (0, self.console.window_top))
+
+    def testBufferModeFillsTheWholeBuffer(self):
+        self.assertEqual(self.clear('buffer'), 2 * 80 * 9001)
+        self.assertScreenCleared()
+        self.assertEqual(self.console.text(0), '')
+
+    def testViewportModeFillsOnlyTheWindow(self):
+        self.assertEqual(self.clear('viewport'), 2 * 80 * 25)
+        self.assertScreenCleared()
+        self.assertEqual(self.console.window_top, 976)
+        self.assertEqual(self.console.text(975), 'line 975')
+
+    def testScrollModeMakesOneCall(self):
+        self.console.calls.clear()
+        self.assertEqual(self.clear('scroll'), 80 * 25)
+        self.assertScreenCleared()
+        self.assertEqual(self.console.text(975), 'line 975')
+        self.assertEqual(self.console.calls['ScrollConsoleScreenBuffer'], 1)
+        self.assertEqual(self.console.calls['FillConsoleOutputCharacter'], 0)
+
+    def testViewportEraseBelowAndAboveCursor(self):
+        self.console.cursor = (4, 990)
+        self.assertEqual(self.clear('viewport', 0), 2 * (80 * 11 - 4))
+        self.assertEqual(self.console.text(990), 'line')
+        self.assertEqual(self.console.text(1001), '')
+        self.console.cells_written = 0
+        self.assertEqual(self.clear('viewport', 1), 2 * (80 * 14 + 4))
+        self.assertEqual(self.console.text(975), 'line 975')
+        self.assertEqual(self.console.text(976), '')
+
+    def testViewportClearUsesShadowWindow(self):
+        term = WinTerm(track_cursor=True, clear_mode='viewport')
+        term.sync_cursor()
+        self.console.calls.clear()
+        term.erase_screen(2)
+        self.assertEqual(self.console.calls['GetConsoleScreenBufferInfo'], 0)
+        self.assertScreenCleared()
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,149 @@
+import sys
+import time
+from array import array
+
+
+TEXT = 0
+WIN32 = 1
+OSC = 2
+
+KIND_NAMES = ('text', 'win32', 'osc')
+
+PRIVATE = 0x80
+
+
+class TraceBuffer:
+
+    MAX_PARAMS = 4
+    MAX_VALUE = 0xFFFFFFFF
+
+    def __init__(self, size=4096):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        self.size = size
+        self.count = 0
+        self.kinds = array('B', bytes(size))
+        self.commands = array('B', bytes(size))
+        self.param_counts = array('B', bytes(size))
+        self.params = array('L', [0]) * (size * self.MAX_PARAMS)
+        self.lengths = array('L', [0]) * size
+        self.timestamps = array('q', [0]) * size
+
+    def record(self, kind, command=0, params=(), length=0):
+        index = self.count % self.size
+        self.count += 1
+        self.kinds[index] = kind
+        self.commands[index] = command
+        self.lengths[index] = min(length, self.MAX_VALUE)
+        self.timestamps[index] = time.monotonic_ns()
+        base = index * self.MAX_PARAMS
+        stored = 0
+        for param in params:
+            if stored == self.MAX_PARAMS:
+                break
+            self.params[base + stored] = min(param, self.MAX_VALUE)
+            stored += 1
+        self.param_counts[index] = stored
+
+    def clear(self):
+        self.count = 0
+
+    def entries(self):
+        first = max(0, self.count - self.size)
+        for n in range(first, self.count):
+            index = n % self.size
+            base = index * self.MAX_PARAMS
+            yield (
+                KIND_NAMES[self.kinds[index]],
+                command_name(self.commands[index]),
+                tuple(self.params[base:base + self.param_counts[index]]),
+                self.lengths[index],
+                self.timestamps[index],
+            )
+
+    def dump(self, file=None):
+        if file is None:
+            file = sys.stderr
+        entries = list(self.entries())
+        file.write('# colorama trace: %d of %d operations\n' % (len(entries), self.count))
+        if not entries:
+            return
+        origin = entries[0][4]
+        for kind, command, params, length, timestamp in entries:
+            file.write('%12.6f %-5s %-2s %-16s %d\n' % (
+                (timestamp - origin) / 1e9, kind, command,
+                ';'.join(map(str, params)), length))
+
+
+def command_code(command):
+    if command[:1] == '?':
+        return PRIVATE | ord(command[1:])
+    return ord(command)
+
+
+def command_name(code):
+    if not code:
+        return ''
+    if code & PRIVATE:
+        return '?' + chr(code & ~PRIVATE)
+    return chr(code)
+
+
+_buffer = None
+
+
+def trace():
+    return _buffer
+
+
+def enable(size=4096):
+    global _buffer
+    _buffer = TraceBuffer(size)
+    return _buffer
+
+
+def trace_converter(converter, buffer):
+    record = buffer.record
+    write_plain_text = converter.write_plain_text
+    blit_runs = converter.blit_runs
+    write_raw_segments = converter.write_raw_segments
+    call_win32 = converter.call_win32
+    convert_osc_command = converter.convert_osc_command
+
+    blitting = False
+
+    def traced_write_plain_text(text, start, end):
+        if start < end and not blitting:
+            record(TEXT, length=end - start)
+        write_plain_text(text, start, end)
+
+    def traced_blit_runs(runs):
+        nonlocal blitting
+        for text, _ in runs:
+            record(TEXT, length=len(text))
+        blitting = True
+        try:
+            blit_runs(runs)
+        finally:
+            blitting = False
+
+    def traced_write_raw_segments(segments, escapes):
+        for segment in segments:
+            record(TEXT, length=len(segment))
+        write_raw_segments(segments, escapes)
+
+    def traced_call_win32(command, params):
+        record(WIN32, command_code(command), params, len(params))
+        call_win32(command, params)
+
+    def traced_convert_osc_command(paramstring):
+        code, _, payload = paramstring.partition(';')
+        numeric = code.isascii() and code.isdigit()
+        record(OSC, 0, (int(code),) if numeric else (), len(payload))
+        convert_osc_command(paramstring)
+
+    converter.write_plain_text = traced_write_plain_text
+    converter.blit_runs = traced_blit_runs
+    converter.write_raw_segments = traced_write_raw_segments
+    converter.call_win32 = traced_call_win32
+    converter.convert_osc_command = traced_convert_osc_command
@@ -12,10 +12,12 @@ except (AttributeError, ImportError):
     windll = None
     SetConsoleTextAttribute = lambda *_: None
     winapi_test = lambda *_: None
+    invalidate_handles = lambda *_: None
 else:
     from ctypes import byref, Structure, c_char, POINTER
 
     COORD = wintypes._COORD
+    SMALL_RECT = wintypes.SMALL_RECT
 
     class CONSOLE_SCREEN_BUFFER_INFO(Structure):
 
@@ -35,12 +37,26 @@ else:
                 , self.dwMaximumWindowSize.Y, self.dwMaximumWindowSize.X
             )
 
+    class CHAR_INFO(Structure):
+
+        _fields_ = [
+            ("Char", wintypes.WCHAR),
+            ("Attributes", wintypes.WORD),
+        ]
+
     _GetStdHandle = windll.kernel32.GetStdHandle
     _GetStdHandle.argtypes = [
         wintypes.DWORD,
     ]
     _GetStdHandle.restype = wintypes.HANDLE
 
+    _SetStdHandle = windll.kernel32.SetStdHandle
+    _SetStdHandle.argtypes = [
+        wintypes.DWORD,
+        wintypes.HANDLE,
+    ]
+    _SetStdHandle.restype = wintypes.BOOL
+
     _GetConsoleScreenBufferInfo = windll.kernel32.GetConsoleScreenBufferInfo
     _GetConsoleScreenBufferInfo.argtypes = [
         wintypes.HANDLE,
@@ -82,6 +98,58 @@ else:
     ]
     _FillConsoleOutputAttribute.restype = wintypes.BOOL
 
+    _WriteConsoleOutputW = windll.kernel32.WriteConsoleOutputW
+    _WriteConsoleOutputW.argtypes = [
+        wintypes.HANDLE,
+        POINTER(CHAR_INFO),
+        COORD,
+        COORD,
+        POINTER(wintypes.SMALL_RECT),
+    ]
+    _WriteConsoleOutputW.restype = wintypes.BOOL
+
+    _ScrollConsoleScreenBufferW = windll.kernel32.ScrollConsoleScreenBufferW
+    _ScrollConsoleScreenBufferW.argtypes = [
+        wintypes.HANDLE,
+        POINTER(wintypes.SMALL_RECT),
+        POINTER(wintypes.SMALL_RECT),
+        COORD,
+        POINTER(CHAR_INFO),
+    ]
+    _ScrollConsoleScreenBufferW.restype = wintypes.BOOL
+
+    _WriteConsoleW = windll.kernel32.WriteConsoleW
+    _WriteConsoleW.argtypes = [
+        wintypes.HANDLE,
+        wintypes.LPCWSTR,
+        wintypes.DWORD,
+        POINTER(wintypes.DWORD),
+        wintypes.LPVOID,
+    ]
+    _WriteConsoleW.restype = wintypes.BOOL
+
+    _CreateConsoleScreenBuffer = windll.kernel32.CreateConsoleScreenBuffer
+    _CreateConsoleScreenBuffer.argtypes = [
+        wintypes.DWORD,
+        wintypes.DWORD,
+        wintypes.LPVOID,
+        wintypes.DWORD,
+        wintypes.LPVOID,
+    ]
+    _CreateConsoleScreenBuffer.restype = wintypes.HANDLE
+
+    _SetConsoleActiveScreenBuffer = windll.kernel32.SetConsoleActiveScreenBuffer
+    _SetConsoleActiveScreenBuffer.argtypes = [
+        wintypes.HANDLE,
+    ]
+    _SetConsoleActiveScreenBuffer.restype = wintypes.BOOL
+
+    _CloseHandle = windll.kernel32.CloseHandle
+    _CloseHandle.argtypes = [
+        wintypes.HANDLE,
+    ]
+    _CloseHandle.restype = wintypes.BOOL
+
     _SetConsoleTitleW = windll.kernel32.SetConsoleTitleW
     _SetConsoleTitleW.argtypes = [
         wintypes.LPCWSTR
@@ -102,6 +170,34 @@ else:
     ]
     _SetConsoleMode.restype = wintypes.BOOL
 
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    _GENERIC_READ_WRITE = 0x80000000 | 0x40000000
+    _FILE_SHARE_READ_WRITE = 0x1 | 0x2
+    _CONSOLE_TEXTMODE_BUFFER = 1
+
+    _handles = {}
+
+    def GetStdHandle(stream_id):
+        handle = _handles.get(stream_id)
+        if handle is None:
+            handle = _GetStdHandle(stream_id)
+            if handle is not None and handle != INVALID_HANDLE_VALUE:
+                _handles[stream_id] = handle
+        return handle
+
+    def invalidate_handles(stream_id=None):
+        if stream_id is None:
+            _handles.clear()
+        else:
+            _handles.pop(stream_id, None)
+
+    def SetStdHandle(stream_id, handle):
+        success = _SetStdHandle(stream_id, handle)
+        invalidate_handles(stream_id)
+        if not success:
+            raise ctypes.WinError()
+
     def _winapi_test(handle):
         csbi = CONSOLE_SCREEN_BUFFER_INFO()
         success = _GetConsoleScreenBufferInfo(
@@ -110,17 +206,17 @@ else:
 
     def winapi_test():
         return any(_winapi_test(h) for h in
-                   (_GetStdHandle(STDOUT), _GetStdHandle(STDERR)))
+                   (GetStdHandle(STDOUT), GetStdHandle(STDERR)))
 
     def GetConsoleScreenBufferInfo(stream_id=STDOUT):
-        handle = _GetStdHandle(stream_id)
+        handle = GetStdHandle(stream_id)
         csbi = CONSOLE_SCREEN_BUFFER_INFO()
         success = _GetConsoleScreenBufferInfo(
             handle, byref(csbi))
         return csbi
 
     def SetConsoleTextAttribute(stream_id, attrs):
-        handle = _GetStdHandle(stream_id)
+        handle = GetStdHandle(stream_id)
         return _SetConsoleTextAttribute(handle, attrs)
 
     def SetConsoleCursorPosition(stream_id, position, adjust=True):
@@ -132,11 +228,11 @@ else:
             sr = GetConsoleScreenBufferInfo(STDOUT).srWindow
             adjusted_position.Y += sr.Top
             adjusted_position.X += sr.Left
-        handle = _GetStdHandle(stream_id)
+        handle = GetStdHandle(stream_id)
         return _SetConsoleCursorPosition(handle, adjusted_position)
 
     def FillConsoleOutputCharacter(stream_id, char, length, start):
-        handle = _GetStdHandle(stream_id)
+        handle = GetStdHandle(stream_id)
         char = c_char(char.encode())
         length = wintypes.DWORD(length)
         num_written = wintypes.DWORD(0)
@@ -146,13 +242,53 @@ else:
 
     def FillConsoleOutputAttribute(stream_id, attr, length, start):
 
-        handle = _GetStdHandle(stream_id)
+        handle = GetStdHandle(stream_id)
         attribute = wintypes.WORD(attr)
         length = wintypes.DWORD(length)
         num_written = wintypes.DWORD(0)
         return _FillConsoleOutputAttribute(
             handle, attribute, length, start, byref(num_written))
 
+    def WriteConsoleOutput(stream_id, text, attrs, start):
+        handle = GetStdHandle(stream_id)
+        length = len(text)
+        cells = (CHAR_INFO * length)(*zip(text, attrs))
+        region = wintypes.SMALL_RECT(
+            start.X, start.Y, start.X + length - 1, start.Y)
+        return _WriteConsoleOutputW(
+            handle, cells, COORD(length, 1), COORD(0, 0), byref(region))
+
+    def ScrollConsoleScreenBuffer(stream_id, scroll_rect, clip_rect, dest, char, attr):
+        handle = GetStdHandle(stream_id)
+        fill = CHAR_INFO(char, attr)
+        if clip_rect is not None:
+            clip_rect = byref(clip_rect)
+        return _ScrollConsoleScreenBufferW(
+            handle, byref(scroll_rect), clip_rect, dest, byref(fill))
+
+    def WriteConsole(stream_id, text):
+        handle = GetStdHandle(stream_id)
+        written = wintypes.DWORD(0)
+        _WriteConsoleW(handle, text, len(text.encode('utf-16-le')) // 2,
+                       byref(written), None)
+        return written.value
+
+    def CreateConsoleScreenBuffer():
+        handle = _CreateConsoleScreenBuffer(
+            _GENERIC_READ_WRITE, _FILE_SHARE_READ_WRITE, None,
+            _CONSOLE_TEXTMODE_BUFFER, None)
+        if handle is None or handle == INVALID_HANDLE_VALUE:
+            raise ctypes.WinError()
+        return handle
+
+    def SetConsoleActiveScreenBuffer(handle):
+        success = _SetConsoleActiveScreenBuffer(handle)
+        if not success:
+            raise ctypes.WinError()
+
+    def CloseHandle(handle):
+        return _CloseHandle(handle)
+
     def SetConsoleTitle(title):
         return _SetConsoleTitleW(title)
 
@@ -1,3 +1,7 @@
+import re
+import threading
+import time
+
 try:
     from msvcrt import get_osfhandle
 except ImportError:
@@ -22,15 +26,110 @@ class WinStyle:
     BRIGHT              = 0x08
     BRIGHT_BACKGROUND   = 0x80
 
-class WinTerm:
+class ShadowCursor:
+
+    TAB_SIZE = 8
 
     def __init__(self):
+        self.valid = False
+        self.x = self.y = 0
+        self.left = self.top = 0
+        self.window_width = self.window_height = 0
+        self.width = self.height = 0
+
+    def load(self, csbi):
+        self.x = csbi.dwCursorPosition.X
+        self.y = csbi.dwCursorPosition.Y
+        self.left = csbi.srWindow.Left
+        self.top = csbi.srWindow.Top
+        self.window_width = csbi.srWindow.Right - csbi.srWindow.Left + 1
+        self.window_height = csbi.srWindow.Bottom - csbi.srWindow.Top + 1
+        self.width = csbi.dwSize.X
+        self.height = csbi.dwSize.Y
+        self.valid = True
+
+    def move_to(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.x = x
+            self.y = y
+            self._scroll_window_to_cursor()
+
+    def advance(self, text):
+        if text.isascii() and text.isprintable():
+            self._advance_columns(len(text))
+            return
+        for char in text:
+            if char == '\n':
+                self.x = 0
+                self._line_feed()
+            elif char == '\r':
+                self.x = 0
+            elif char == '\b':
+                self.x = max(self.x - 1, 0)
+            elif char == '\t':
+                tab_stop = (self.x // self.TAB_SIZE + 1) * self.TAB_SIZE
+                self.x = min(tab_stop, self.width - 1)
+            elif char == '\a':
+                pass
+            elif ord(char) < 0x20 or ord(char) >= 0x1100:
+                self.valid = False
+                return
+            else:
+                self._advance_columns(1)
+        self._scroll_window_to_cursor()
+
+    def _advance_columns(self, count):
+        rows, self.x = divmod(self.x + count, self.width)
+        for _ in range(rows):
+            self._line_feed()
+        self._scroll_window_to_cursor()
+
+    def _line_feed(self):
+        if self.y < self.height - 1:
+            self.y += 1
+
+    def _scroll_window_to_cursor(self):
+        if self.y < self.top:
+            self.top = self.y
+        elif self.y >= self.top + self.window_height:
+            self.top = self.y - self.window_height + 1
+
+
+class _ScreenInfo:
+    pass
+
+
+class WinTerm:
+
+    BLIT_BREAK_RE = re.compile('([\r\n])')
+
+    TITLE_INTERVAL = 0.1
+
+    CLEAR_MODES = ('buffer', 'viewport', 'scroll')
+
+    def __init__(self, track_cursor=False, title_interval=None, clear_mode='buffer',
+                 double_buffer=False):
         self._default = win32.GetConsoleScreenBufferInfo(win32.STDOUT).wAttributes
         self.set_attrs(self._default)
         self._default_fore = self._fore
         self._default_back = self._back
         self._default_style = self._style
         self._light = 0
+        self._batching = False
+        self._batched_console = None
+        self.shadow = None
+        if track_cursor:
+            self.set_cursor_tracking(True)
+        self.title_interval = self.TITLE_INTERVAL if title_interval is None else title_interval
+        self._pending_title = None
+        self._title_applied = None
+        self._title_timer = None
+        self._title_lock = threading.Lock()
+        self.clear_mode = clear_mode
+        self.scroll_region = None
+        self._saved_cursor = None
+        self.double_buffer = double_buffer
+        self.screens = None
 
     def get_attrs(self):
         return self._fore + self._back * 16 + (self._style | self._light)
@@ -74,12 +173,59 @@ class WinTerm:
     def set_console(self, attrs=None, on_stderr=False):
         if attrs is None:
             attrs = self.get_attrs()
+        if self._batching:
+            self._batched_console = (attrs, on_stderr)
+            return
         handle = win32.STDOUT
         if on_stderr:
             handle = win32.STDERR
         win32.SetConsoleTextAttribute(handle, attrs)
 
+    def refresh_handles(self):
+        win32.invalidate_handles()
+        self.invalidate_cursor()
+
+    def set_cursor_tracking(self, enabled):
+        self.shadow = ShadowCursor() if enabled else None
+
+    def sync_cursor(self, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        if self.shadow is not None:
+            self.shadow.load(win32.GetConsoleScreenBufferInfo(handle))
+
+    def invalidate_cursor(self):
+        if self.shadow is not None:
+            self.shadow.valid = False
+
+    def advance_cursor(self, text):
+        shadow = self.shadow
+        if shadow is not None and shadow.valid:
+            shadow.advance(text)
+
+    def _tracked_cursor(self, handle):
+        shadow = self.shadow
+        if not shadow.valid:
+            shadow.load(win32.GetConsoleScreenBufferInfo(handle))
+        return shadow
+
+    def _screen_info(self, handle):
+        if self.shadow is None:
+            return win32.GetConsoleScreenBufferInfo(handle)
+        shadow = self._tracked_cursor(handle)
+        csbi = _ScreenInfo()
+        csbi.dwSize = win32.COORD(shadow.width, shadow.height)
+        csbi.dwCursorPosition = win32.COORD(shadow.x, shadow.y)
+        csbi.srWindow = win32.SMALL_RECT(
+            shadow.left, shadow.top, shadow.left + shadow.window_width - 1,
+            shadow.top + shadow.window_height - 1)
+        return csbi
+
     def get_position(self, handle):
+        if self.shadow is not None:
+            shadow = self._tracked_cursor(handle)
+            return win32.COORD(shadow.x + 1, shadow.y + 1)
         position = win32.GetConsoleScreenBufferInfo(handle).dwCursorPosition
         position.X += 1
         position.Y += 1
@@ -91,7 +237,17 @@ class WinTerm:
         handle = win32.STDOUT
         if on_stderr:
             handle = win32.STDERR
-        win32.SetConsoleCursorPosition(handle, position)
+        if self.shadow is None:
+            win32.SetConsoleCursorPosition(handle, position)
+            return
+        row, column = position
+        if row <= 0 or column <= 0:
+            return
+        shadow = self._tracked_cursor(handle)
+        row += shadow.top
+        column += shadow.left
+        win32.SetConsoleCursorPosition(handle, (row, column), adjust=False)
+        shadow.move_to(column - 1, row - 1)
 
     def cursor_adjust(self, x, y, on_stderr=False):
         handle = win32.STDOUT
@@ -100,35 +256,48 @@ class WinTerm:
         position = self.get_position(handle)
         adjusted_position = (position.Y + y, position.X + x)
         win32.SetConsoleCursorPosition(handle, adjusted_position, adjust=False)
+        if self.shadow is not None and position.Y + y > 0 and position.X + x > 0:
+            self.shadow.move_to(position.X + x - 1, position.Y + y - 1)
 
     def erase_screen(self, mode=0, on_stderr=False):
         handle = win32.STDOUT
         if on_stderr:
             handle = win32.STDERR
-        csbi = win32.GetConsoleScreenBufferInfo(handle)
-        cells_in_screen = csbi.dwSize.X * csbi.dwSize.Y
-        cells_before_cursor = csbi.dwSize.X * csbi.dwCursorPosition.Y + csbi.dwCursorPosition.X
+        csbi = self._screen_info(handle)
+        width = csbi.dwSize.X
+        if self.clear_mode == 'buffer':
+            first_row, end_row = 0, csbi.dwSize.Y
+        else:
+            first_row, end_row = csbi.srWindow.Top, csbi.srWindow.Bottom + 1
+        cells_before_cursor = width * csbi.dwCursorPosition.Y + csbi.dwCursorPosition.X
         if mode == 0:
             from_coord = csbi.dwCursorPosition
-            cells_to_erase = cells_in_screen - cells_before_cursor
+            cells_to_erase = width * end_row - cells_before_cursor
         elif mode == 1:
-            from_coord = win32.COORD(0, 0)
-            cells_to_erase = cells_before_cursor
+            from_coord = win32.COORD(0, first_row)
+            cells_to_erase = cells_before_cursor - width * first_row
         elif mode == 2:
-            from_coord = win32.COORD(0, 0)
-            cells_to_erase = cells_in_screen
+            if self.clear_mode == 'scroll':
+                window = csbi.srWindow
+                self._scroll_rows(handle, width, window.Top, window.Bottom,
+                                  window.Bottom - window.Top + 1)
+                self.set_cursor_position((1, 1), on_stderr=on_stderr)
+                return
+            from_coord = win32.COORD(0, first_row)
+            cells_to_erase = width * (end_row - first_row)
         else:
             return
-        win32.FillConsoleOutputCharacter(handle, ' ', cells_to_erase, from_coord)
-        win32.FillConsoleOutputAttribute(handle, self.get_attrs(), cells_to_erase, from_coord)
+        if cells_to_erase > 0:
+            win32.FillConsoleOutputCharacter(handle, ' ', cells_to_erase, from_coord)
+            win32.FillConsoleOutputAttribute(handle, self.get_attrs(), cells_to_erase, from_coord)
         if mode == 2:
-            win32.SetConsoleCursorPosition(handle, (1, 1))
+            self.set_cursor_position((1, 1), on_stderr=on_stderr)
 
     def erase_line(self, mode=0, on_stderr=False):
         handle = win32.STDOUT
         if on_stderr:
             handle = win32.STDERR
-        csbi = win32.GetConsoleScreenBufferInfo(handle)
+        csbi = self._screen_info(handle)
         if mode == 0:
             from_coord = csbi.dwCursorPosition
             cells_to_erase = csbi.dwSize.X - csbi.dwCursorPosition.X
@@ -143,8 +312,211 @@ class WinTerm:
         win32.FillConsoleOutputCharacter(handle, ' ', cells_to_erase, from_coord)
         win32.FillConsoleOutputAttribute(handle, self.get_attrs(), cells_to_erase, from_coord)
 
+    def save_cursor(self, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        csbi = self._screen_info(handle)
+        self._saved_cursor = (csbi.dwCursorPosition.Y - csbi.srWindow.Top + 1,
+                              csbi.dwCursorPosition.X - csbi.srWindow.Left + 1)
+
+    def restore_cursor(self, on_stderr=False):
+        if self._saved_cursor is not None:
+            self.set_cursor_position(self._saved_cursor, on_stderr=on_stderr)
+
+    def set_scroll_region(self, top=None, bottom=None, on_stderr=False):
+        if top is None and bottom is None:
+            self.scroll_region = None
+        else:
+            top = 1 if top is None else top
+            if bottom is not None and bottom <= top:
+                return
+            self.scroll_region = (top - 1, None if bottom is None else bottom - 1)
+        self.set_cursor_position((1, 1), on_stderr=on_stderr)
+
+    def _region_rows(self, window):
+        if self.scroll_region is None:
+            return window.Top, window.Bottom
+        top, bottom = self.scroll_region
+        if bottom is None:
+            return window.Top + top, window.Bottom
+        return window.Top + top, min(window.Top + bottom, window.Bottom)
+
+    def scroll(self, lines, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        csbi = self._screen_info(handle)
+        top, bottom = self._region_rows(csbi.srWindow)
+        if lines != 0 and top <= bottom:
+            self._scroll_rows(handle, csbi.dwSize.X, top, bottom, lines)
+
+    def _scroll_rows(self, handle, width, top, bottom, lines):
+        rect = win32.SMALL_RECT(0, top, width - 1, bottom)
+        win32.ScrollConsoleScreenBuffer(
+            handle, rect, rect, win32.COORD(0, top - lines), ' ', self.get_attrs())
+
+    def scroll_region_line_feed(self, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        csbi = self._screen_info(handle)
+        top, bottom = self._region_rows(csbi.srWindow)
+        y = csbi.dwCursorPosition.Y
+        if y != bottom:
+            return False
+        self._scroll_rows(handle, csbi.dwSize.X, top, bottom, 1)
+        win32.SetConsoleCursorPosition(handle, (y + 1, 1), adjust=False)
+        if self.shadow is not None:
+            self.shadow.move_to(0, y)
+        return True
+
+    @property
+    def redirected(self):
+        return self.scroll_region is not None or self.screens is not None
+
+    def enter_alternate_screen(self):
+        if self.screens is not None:
+            return
+        main = (win32.GetStdHandle(win32.STDOUT), win32.GetStdHandle(win32.STDERR))
+        front = win32.CreateConsoleScreenBuffer()
+        back = win32.CreateConsoleScreenBuffer() if self.double_buffer else front
+        win32.SetConsoleActiveScreenBuffer(front)
+        self.screens = [main, front, back]
+        self.scroll_region = None
+        self._target(back, back)
+
+    def exit_alternate_screen(self):
+        if self.screens is None:
+            return
+        main, front, back = self.screens
+        self.screens = None
+        win32.SetConsoleActiveScreenBuffer(main[0])
+        self._target(*main)
+        win32.CloseHandle(front)
+        if back != front:
+            win32.CloseHandle(back)
+
+    def swap_buffers(self):
+        screens = self.screens
+        if screens is None or screens[1] == screens[2]:
+            return False
+        main, front, back = screens
+        win32.SetConsoleActiveScreenBuffer(back)
+        screens[1:] = back, front
+        self._target(front, front)
+        return True
+
+    def _target(self, stdout, stderr):
+        win32.SetStdHandle(win32.STDOUT, stdout)
+        win32.SetStdHandle(win32.STDERR, stderr)
+        self.invalidate_cursor()
+        self.set_console()
+
+    def write_text(self, text, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        win32.WriteConsole(handle, text)
+
+    def begin_batch(self):
+        self._batching = True
+        self._batched_console = None
+
+    def end_batch(self, apply=True):
+        self._batching = False
+        batched, self._batched_console = self._batched_console, None
+        if apply and batched is not None:
+            self.set_console(*batched)
+
+    def blit(self, runs, on_stderr=False):
+        handle = win32.STDOUT
+        if on_stderr:
+            handle = win32.STDERR
+        csbi = self._screen_info(handle)
+        width, height = csbi.dwSize.X, csbi.dwSize.Y
+        x, y = csbi.dwCursorPosition.X, csbi.dwCursorPosition.Y
+        origin = (x, y)
+        spans = []
+        span_start, span_text, span_attrs = (x, y), [], []
+        rest = []
+        for index, (text, attrs) in enumerate(runs):
+            offset = 0
+            for part in self.BLIT_BREAK_RE.split(text):
+                if part in ('\n', '\r'):
+                    if part == '\n' and y == height - 1:
+                        rest = [(text[offset:], attrs)] + runs[index + 1:]
+                        break
+                    if span_text:
+                        spans.append((span_start, ''.join(span_text), span_attrs))
+                        span_text, span_attrs = [], []
+                    if part == '\n':
+                        y += 1
+                    x = 0
+                    span_start = (x, y)
+                elif part:
+                    if (not _blittable(part)
+                            or y + (x + len(part)) // width >= height):
+                        rest = [(text[offset:], attrs)] + runs[index + 1:]
+                        break
+                    remaining = part
+                    while remaining:
+                        piece = remaining[:width - x]
+                        remaining = remaining[len(piece):]
+                        span_text.append(piece)
+                        span_attrs.extend([attrs] * len(piece))
+                        x += len(piece)
+                        if x == width:
+                            spans.append((span_start, ''.join(span_text), span_attrs))
+                            span_text, span_attrs = [], []
+                            x, y = 0, y + 1
+                            span_start = (x, y)
+                offset += len(part)
+            if rest:
+                break
+        if span_text:
+            spans.append((span_start, ''.join(span_text), span_attrs))
+        for (span_x, span_y), span_text, span_attrs in spans:
+            win32.WriteConsoleOutput(
+                handle, span_text, span_attrs, win32.COORD(span_x, span_y))
+        if spans or (x, y) != origin:
+            win32.SetConsoleCursorPosition(handle, (y + 1, x + 1), adjust=False)
+            if self.shadow is not None:
+                self.shadow.move_to(x, y)
+        return rest
+
+    def _clock(self):
+        return time.monotonic()
+
     def set_title(self, title):
-        win32.SetConsoleTitle(title)
+        with self._title_lock:
+            now = self._clock()
+            applied = self._title_applied
+            if applied is None or now - applied >= self.title_interval:
+                self._pending_title = None
+                self._title_applied = now
+                win32.SetConsoleTitle(title)
+                return
+            self._pending_title = title
+            if self._title_timer is None:
+                delay = self.title_interval - (now - applied)
+                self._title_timer = threading.Timer(delay, self.flush_title)
+                self._title_timer.daemon = True
+                self._title_timer.start()
+
+    def flush_title(self):
+        with self._title_lock:
+            if self._title_timer is not None:
+                self._title_timer.cancel()
+                self._title_timer = None
+            title, self._pending_title = self._pending_title, None
+            if title is not None:
+                self._title_applied = self._clock()
+                win32.SetConsoleTitle(title)
+
+
+def _blittable(text):
+    return text.isprintable() and (text.isascii() or max(text) < '\u1100')
 
 
 def enable_vt_processing(fd):
@@ -13,9 +13,10 @@ FORES = [ Fore.BLACK, Fore.RED, Fore.GREEN, Fore.YELLOW, Fore.BLUE, Fore.MAGENTA
 BACKS = [ Back.BLACK, Back.RED, Back.GREEN, Back.YELLOW, Back.BLUE, Back.MAGENTA, Back.CYAN, Back.WHITE ]
 STYLES = [ Style.DIM, Style.NORMAL, Style.BRIGHT ]
 
-# This assumes your terminal is 80x24. Ansi minimum coordinate is (1,1).
-MINY, MAXY = 1, 24
-MINX, MAXX = 1, 80
+# Fill the terminal, or 80x24 if its size is unknown. Ansi minimum coordinate is (1,1).
+COLUMNS, LINES = colorama.terminal_size()
+MINY, MAXY = 1, LINES
+MINX, MAXX = 1, COLUMNS
 
 # set of printable ASCII characters, including a space.
 CHARS = ' ' + printable.strip()